@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     Student, Course, Enrollment, Attendance,
-    Assignment, Submission, Notification, Announcement
+    Assignment, Submission, Notification, Announcement, Job, AttendanceSummary,
+    AttendanceArchive,
 )
 
 @admin.register(Student)
@@ -53,6 +54,19 @@ class AttendanceAdmin(admin.ModelAdmin):
     date_hierarchy = 'date'
 
 
+@admin.register(AttendanceArchive)
+class AttendanceArchiveAdmin(admin.ModelAdmin):
+    list_display = ['academic_year', 'rows_archived', 'started_at', 'completed_at']
+    readonly_fields = ['academic_year', 'rows_archived', 'started_at', 'completed_at']
+
+
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'course', 'total', 'present', 'absent', 'late', 'excused', 'updated_at']
+    search_fields = ['student__name', 'course__name']
+    readonly_fields = ['student', 'course', 'total', 'present', 'absent', 'late', 'excused', 'updated_at']
+
+
 @admin.register(Assignment)
 class AssignmentAdmin(admin.ModelAdmin):
     list_display = ['title', 'course', 'due_date', 'total_marks', 'created_by', 'is_active']
@@ -83,3 +97,11 @@ class AnnouncementAdmin(admin.ModelAdmin):
     search_fields = ['title', 'content']
     list_filter = ['is_active', 'priority', 'created_at']
     readonly_fields = ['created_at']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'status', 'progress', 'created_by', 'created_at', 'finished_at']
+    search_fields = ['kind', 'message']
+    list_filter = ['kind', 'status', 'created_at']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
@@ -0,0 +1,166 @@
+import hashlib
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import metrics_version
+from .models import Student
+
+ANALYTICS_CACHE_KEY = 'student:analytics:{digest}'
+
+# Grouping keys accepted by marks_analytics()
+GROUP_FIELDS = {
+    'class': ['class_name'],
+    'section': ['class_name', 'section'],
+}
+
+
+def percentiles():
+    return list(getattr(settings, 'ANALYTICS_PERCENTILES', [10, 25, 50, 75, 90]))
+
+
+def parse_bins(value):
+    """
+    Histogram bins from a request parameter: a number of equal-width bins
+    over 0-100, or ascending comma-separated edges such as "0,40,60,80,100".
+    Raises ValueError for anything else.
+    """
+    parts = [part for part in str(value).split(',') if part.strip()]
+    try:
+        if len(parts) == 1:
+            count = int(parts[0])
+        else:
+            edges = tuple(float(part) for part in parts)
+    except ValueError:
+        raise ValueError('bins must be a number of bins or comma-separated edges.')
+    if len(parts) == 1:
+        if not 1 <= count <= 100:
+            raise ValueError('bins must be between 1 and 100.')
+        return count
+    if len(edges) < 2 or any(low >= high for low, high in zip(edges, edges[1:])):
+        raise ValueError('bin edges must be ascending.')
+    return edges
+
+
+def load_marks(class_name=None, section=None, group_fields=()):
+    """
+    Fetch the marks of active students in scope, plus ``group_fields``, in
+    one query. Returns ``(marks, groups)``: a float array and a list of
+    group-key tuples aligned with it.
+    """
+    students = Student.objects.filter(is_active=True)
+    if class_name:
+        students = students.filter(class_name=class_name)
+    if section:
+        students = students.filter(section=section)
+    rows = list(students.order_by().values_list('marks', *group_fields))
+    marks = np.fromiter((row[0] for row in rows), dtype=float, count=len(rows))
+    return marks, [row[1:] for row in rows]
+
+
+def summarize(marks, bins=10):
+    """Distribution statistics and histogram of a marks array"""
+    if isinstance(bins, int):
+        edges = np.linspace(0, 100, bins + 1)
+    else:
+        edges = np.asarray(bins, dtype=float)
+    counts, edges = np.histogram(marks, bins=edges)
+    histogram = {'edges': _round(edges), 'counts': counts.tolist()}
+
+    if not marks.size:
+        return {
+            'count': 0, 'mean': None, 'std': None, 'min': None, 'max': None, 'median': None,
+            'percentiles': {f'p{q:g}': None for q in percentiles()},
+            'histogram': histogram,
+        }
+    values = np.percentile(marks, percentiles())
+    return {
+        'count': int(marks.size),
+        'mean': _round(marks.mean()),
+        'std': _round(marks.std()),
+        'min': _round(marks.min()),
+        'max': _round(marks.max()),
+        'median': _round(np.median(marks)),
+        'percentiles': {f'p{q:g}': _round(value) for q, value in zip(percentiles(), values)},
+        'histogram': histogram,
+    }
+
+
+def compare_groups(marks, groups, group_fields):
+    """
+    Per-group count, mean, standard deviation, min, max and quartiles.
+
+    The groups are computed together: marks are sorted by (group, marks)
+    once, and then every statistic is taken from the segment offsets
+    instead of looping over the groups.
+    """
+    if not marks.size:
+        return []
+    keys, first, inverse = np.unique(
+        np.array([str(group) for group in groups]), return_index=True, return_inverse=True
+    )
+    counts = np.bincount(inverse)
+    means = np.bincount(inverse, weights=marks) / counts
+    variances = np.bincount(inverse, weights=marks ** 2) / counts - means ** 2
+    ordered = marks[np.lexsort((marks, inverse))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    def quantile(q):
+        # Linear interpolation inside each group's sorted segment
+        position = starts + q * (counts - 1)
+        low = np.floor(position).astype(int)
+        high = np.ceil(position).astype(int)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    stats = {
+        'count': counts.tolist(),
+        'mean': _round(means),
+        'std': _round(np.sqrt(np.maximum(variances, 0))),
+        'min': _round(ordered[starts]),
+        'max': _round(ordered[starts + counts - 1]),
+        'p25': _round(quantile(0.25)),
+        'median': _round(quantile(0.5)),
+        'p75': _round(quantile(0.75)),
+    }
+    return [
+        {
+            **dict(zip(group_fields, groups[first[index]])),
+            **{name: values[index] for name, values in stats.items()},
+        }
+        for index in range(len(keys))
+    ]
+
+
+def marks_analytics(class_name=None, section=None, bins=10, group_by='class'):
+    """
+    Marks distribution of the active students in scope (optionally one
+    class and section) with a comparison across classes or sections.
+
+    Results are cached for ANALYTICS_CACHE_TTL seconds and dropped as soon
+    as student data changes (see metrics.invalidate_dashboard_metrics).
+    """
+    params = repr((class_name or '', section or '', bins, group_by))
+    key = ANALYTICS_CACHE_KEY.format(digest=hashlib.md5(params.encode()).hexdigest())
+    return cache.get_or_set(
+        key,
+        lambda: _compute(class_name, section, bins, group_by),
+        getattr(settings, 'ANALYTICS_CACHE_TTL', 600),
+        version=metrics_version(),
+    )
+
+
+def _compute(class_name, section, bins, group_by):
+    group_fields = GROUP_FIELDS[group_by]
+    marks, groups = load_marks(class_name, section, group_fields)
+    return {
+        'scope': {'class_name': class_name, 'section': section},
+        'summary': summarize(marks, bins),
+        'group_by': group_by,
+        'groups': compare_groups(marks, groups, group_fields),
+    }
+
+
+def _round(value):
+    """Round a NumPy scalar or array to two places as plain Python numbers"""
+    return np.round(value, 2).tolist()
@@ -11,8 +11,10 @@ router.register(r'assignments', api_views.AssignmentViewSet)
 router.register(r'submissions', api_views.SubmissionViewSet)
 router.register(r'notifications', api_views.NotificationViewSet)
 router.register(r'announcements', api_views.AnnouncementViewSet)
+router.register(r'jobs', api_views.JobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('stats/', api_views.stats_api, name='api_stats'),
+    path('analytics/', api_views.analytics_api, name='api_analytics'),
 ]
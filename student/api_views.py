@@ -1,20 +1,31 @@
-from rest_framework import viewsets, status
+from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Avg, Count, Q
+from django.db.models import Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 
 from .models import (
     Student, Course, Enrollment, Attendance,
-    Assignment, Submission, Notification, Announcement
+    Assignment, Submission, Notification, Announcement, Job
 )
 from .serializers import (
     StudentSerializer, CourseSerializer, EnrollmentSerializer,
     AttendanceSerializer, AssignmentSerializer, SubmissionSerializer,
-    NotificationSerializer, AnnouncementSerializer
+    NotificationSerializer, AnnouncementSerializer, JobSerializer,
+    AttendanceBatchSerializer, MarkReadSerializer, MarksBatchSerializer
 )
+from .analytics import GROUP_FIELDS, marks_analytics, parse_bins
+from .archival import attendance_for_year, requested_year
+from .attendance import annotate_attendance, mark_attendance_bulk
+from .gradebook import gradebook_students, save_marks_bulk
+from .removal import remove_students
+from .jobs import enqueue, visible_jobs
+from .metrics import dashboard_metrics
+from .notifications import mark_read as mark_notifications_read, unread_count
+from .search import StudentSearchFilter
 
 
 class StudentViewSet(viewsets.ModelViewSet):
@@ -22,16 +33,50 @@ class StudentViewSet(viewsets.ModelViewSet):
     queryset = Student.objects.filter(is_active=True)
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, StudentSearchFilter, filters.OrderingFilter]
     filterset_fields = ['grade', 'class_name', 'section', 'gender']
     search_fields = ['name', 'roll_number', 'email']
     ordering_fields = ['name', 'roll_number', 'marks', 'created_at']
     
+    def get_queryset(self):
+        """Annotate attendance and enrollment counts so rows need no extra queries"""
+        active_enrollments = Enrollment.objects.filter(
+            student=OuterRef('pk'), is_active=True
+        ).order_by().values('student').annotate(count=Count('pk')).values('count')
+        queryset = annotate_attendance(super().get_queryset())
+        # Grouped queries ignore Meta.ordering, so restore it explicitly
+        return queryset.annotate(
+            active_enrollments_count=Coalesce(Subquery(active_enrollments, output_field=IntegerField()), 0)
+        ).order_by('-created_at')
+    
+    def perform_destroy(self, instance):
+        # Set-based cascade instead of loading the student's attendance history
+        remove_students([instance.pk])
+    
+    @action(detail=False, methods=['post'])
+    def marks(self, request):
+        """Record marks for many students at once; invalid rows are reported, not saved"""
+        serializer = MarksBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        students = None
+        if data.get('class_name'):
+            students = gradebook_students(data['class_name'], data.get('section'))
+        marks = {record['student']: record['marks'] for record in data['records']}
+        saved, errors = save_marks_bulk(marks, students)
+        return Response({
+            'saved': saved,
+            'errors': [{'student': student_id, 'error': error} for student_id, error in errors.items()],
+        })
+    
     @action(detail=True, methods=['get'])
     def attendance(self, request, pk=None):
         """Get attendance records for a student"""
         student = self.get_object()
-        attendances = Attendance.objects.filter(student=student)
+        attendances = attendance_for_year(requested_year(request.query_params)).filter(
+            student=student
+        ).select_related('student', 'course')
         serializer = AttendanceSerializer(attendances, many=True)
         return Response(serializer.data)
     
@@ -39,14 +84,14 @@ class StudentViewSet(viewsets.ModelViewSet):
     def courses(self, request, pk=None):
         """Get enrolled courses for a student"""
         student = self.get_object()
-        enrollments = Enrollment.objects.filter(student=student, is_active=True)
+        enrollments = Enrollment.objects.filter(student=student, is_active=True).select_related('student', 'course')
         serializer = EnrollmentSerializer(enrollments, many=True)
         return Response(serializer.data)
 
 
 class CourseViewSet(viewsets.ModelViewSet):
     """API endpoint for courses"""
-    queryset = Course.objects.filter(is_active=True)
+    queryset = Course.objects.filter(is_active=True).with_stats()
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
@@ -57,14 +102,14 @@ class CourseViewSet(viewsets.ModelViewSet):
     def students(self, request, pk=None):
         """Get enrolled students for a course"""
         course = self.get_object()
-        enrollments = Enrollment.objects.filter(course=course, is_active=True)
+        enrollments = Enrollment.objects.filter(course=course, is_active=True).select_related('student', 'course')
         serializer = EnrollmentSerializer(enrollments, many=True)
         return Response(serializer.data)
 
 
 class EnrollmentViewSet(viewsets.ModelViewSet):
     """API endpoint for enrollments"""
-    queryset = Enrollment.objects.all()
+    queryset = Enrollment.objects.select_related('student', 'course')
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
@@ -73,17 +118,35 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
 
 class AttendanceViewSet(viewsets.ModelViewSet):
     """API endpoint for attendance"""
-    queryset = Attendance.objects.all()
+    queryset = Attendance.objects.select_related('student', 'course')
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['student', 'course', 'status', 'date']
     ordering_fields = ['date']
+    
+    def get_queryset(self):
+        """List one academic year (?year= or the year of ?date=, else the current one)"""
+        if self.action != 'list':
+            return super().get_queryset()
+        year = requested_year(self.request.query_params)
+        return attendance_for_year(year).select_related('student', 'course')
+    
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Mark attendance for a whole course roster at once"""
+        serializer = AttendanceBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        statuses = {record['student']: record['status'] for record in data['records']}
+        saved, skipped = mark_attendance_bulk(data['course'], data['date'], statuses, marked_by=request.user)
+        return Response({'saved': saved, 'skipped': skipped})
 
 
 class AssignmentViewSet(viewsets.ModelViewSet):
     """API endpoint for assignments"""
-    queryset = Assignment.objects.filter(is_active=True)
+    queryset = Assignment.objects.filter(is_active=True).select_related('course')
     serializer_class = AssignmentSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
@@ -93,11 +156,16 @@ class AssignmentViewSet(viewsets.ModelViewSet):
 
 class SubmissionViewSet(viewsets.ModelViewSet):
     """API endpoint for submissions"""
-    queryset = Submission.objects.all()
+    queryset = Submission.objects.select_related('student', 'assignment')
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['assignment', 'student']
+    
+    def perform_update(self, serializer):
+        submission = serializer.save()
+        if 'marks_obtained' in serializer.validated_data and submission.marks_obtained is not None:
+            enqueue('notify_grades', {'submission_ids': [submission.pk]}, user=self.request.user)
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -113,39 +181,90 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
-        return Response({'status': 'success', 'message': 'All notifications marked as read'})
+        updated = mark_notifications_read(request.user)
+        return Response({
+            'status': 'success', 'message': 'All notifications marked as read',
+            'updated': updated, 'unread_count': unread_count(request.user.pk),
+        })
+    
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        """Mark the given ids, or everything up to ``up_to``, as read in one update"""
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_notifications_read(request.user, **serializer.validated_data)
+        return Response({
+            'status': 'success', 'updated': updated,
+            'unread_count': unread_count(request.user.pk),
+        })
 
 
 class AnnouncementViewSet(viewsets.ModelViewSet):
     """API endpoint for announcements"""
-    queryset = Announcement.objects.filter(is_active=True)
+    queryset = Announcement.objects.filter(is_active=True).select_related('created_by')
     serializer_class = AnnouncementSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['priority', 'created_at']
 
 
+class JobViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """API endpoint to submit and poll background jobs"""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """Staff see every job, other users only their own"""
+        return visible_jobs(self.request.user)
+    
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        serializer.instance = enqueue(
+            data['kind'],
+            data.get('params'),
+            user=self.request.user,
+            input_file=data.get('input_file'),
+        )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def stats_api(request):
     """Get dashboard statistics"""
-    total_students = Student.objects.filter(is_active=True).count()
-    total_courses = Course.objects.filter(is_active=True).count()
-    average_marks = Student.objects.filter(is_active=True).aggregate(Avg('marks'))['marks__avg'] or 0
-    
-    # Grade distribution
-    grade_distribution = Student.objects.filter(is_active=True).values('grade').annotate(count=Count('grade'))
-    
-    # Attendance stats
-    total_attendance = Attendance.objects.count()
-    present_count = Attendance.objects.filter(status='P').count()
-    attendance_percentage = (present_count / total_attendance * 100) if total_attendance > 0 else 0
+    metrics = dashboard_metrics()
     
     return Response({
-        'total_students': total_students,
-        'total_courses': total_courses,
-        'average_marks': round(average_marks, 2),
-        'grade_distribution': list(grade_distribution),
-        'attendance_percentage': round(attendance_percentage, 2),
+        'total_students': metrics['total_students'],
+        'total_courses': metrics['total_courses'],
+        'average_marks': metrics['average_marks'],
+        'grade_distribution': metrics['grade_distribution'],
+        'attendance_percentage': metrics['attendance_percentage'],
     })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def analytics_api(request):
+    """
+    Marks distribution (percentiles, standard deviation, histogram) and a
+    per-class or per-section comparison. Optional parameters: class_name,
+    section, bins (a count or comma-separated edges) and group_by
+    (class or section).
+    """
+    group_by = request.query_params.get('group_by', 'class')
+    if group_by not in GROUP_FIELDS:
+        return Response(
+            {'group_by': f'Choose one of: {", ".join(GROUP_FIELDS)}.'}, status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        bins = parse_bins(request.query_params.get('bins', 10))
+    except ValueError as e:
+        return Response({'bins': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(marks_analytics(
+        class_name=request.query_params.get('class_name') or None,
+        section=request.query_params.get('section') or None,
+        bins=bins,
+        group_by=group_by,
+    ))
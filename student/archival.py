@@ -0,0 +1,163 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .metrics import invalidate_dashboard_metrics
+from .models import ArchivedAttendance, Attendance, AttendanceArchive
+
+ARCHIVE_FIELDS = ['id', 'student_id', 'course_id', 'date', 'status', 'remarks', 'marked_by_id', 'created_at']
+
+
+# ==================== ACADEMIC YEARS ====================
+
+def academic_year_of(day):
+    """The academic year ``day`` falls in, named by the calendar year it starts in"""
+    start_month = getattr(settings, 'ACADEMIC_YEAR_START_MONTH', 6)
+    return day.year if day.month >= start_month else day.year - 1
+
+
+def academic_year_dates(year):
+    """First day of academic ``year`` and first day of the next one"""
+    start_month = getattr(settings, 'ACADEMIC_YEAR_START_MONTH', 6)
+    return date(year, start_month, 1), date(year + 1, start_month, 1)
+
+
+def academic_year_label(year):
+    return f'{year}-{(year + 1) % 100:02d}'
+
+
+def current_academic_year():
+    return academic_year_of(timezone.localdate())
+
+
+def _as_date(value):
+    return parse_date(value) if isinstance(value, str) else value
+
+
+# ==================== QUERYING ====================
+
+def archived_years():
+    """Academic years with rows in ArchivedAttendance, including ones still being archived"""
+    return set(AttendanceArchive.objects.values_list('academic_year', flat=True))
+
+
+def attendance_for_year(year=None):
+    """
+    Attendance rows of academic ``year`` (the current one by default), read
+    from ArchivedAttendance once that year has been archived.
+    """
+    if year is None:
+        year = current_academic_year()
+    if AttendanceArchive.objects.filter(academic_year=year, completed_at__isnull=False).exists():
+        return ArchivedAttendance.objects.filter(academic_year=year)
+    start, end = academic_year_dates(year)
+    return Attendance.objects.filter(date__gte=start, date__lt=end)
+
+
+def requested_year(params):
+    """Academic year selected by a ``year`` or ``date`` query parameter, or None for the current one"""
+    year = params.get('year', '')
+    if year.isdigit():
+        return int(year)
+    try:
+        day = parse_date(params.get('date') or '')
+    except ValueError:
+        day = None
+    return academic_year_of(day) if day else None
+
+
+def validate_open_year(day):
+    """
+    Reject attendance dated in an archived (or archiving) academic year: the
+    live table no longer holds that year, so a late row would be invisible
+    and could duplicate an archived one.
+    """
+    day = _as_date(day)
+    if day is None:
+        return
+    year = academic_year_of(day)
+    if AttendanceArchive.objects.filter(academic_year=year).exists():
+        raise ValidationError(
+            f'Attendance for {academic_year_label(year)} has been archived and can no longer be changed.'
+        )
+
+
+def range_reaches_archive(date_from=None, date_to=None):
+    """Whether attendance between ``date_from`` and ``date_to`` (open-ended when None) may be archived"""
+    years = archived_years()
+    if not years:
+        return False
+    date_from, date_to = _as_date(date_from), _as_date(date_to)
+    first = academic_year_of(date_from) if date_from else min(years)
+    last = academic_year_of(date_to) if date_to else max(years)
+    return any(first <= year <= last for year in years)
+
+
+def available_years():
+    """Academic years that have attendance, newest first"""
+    years = archived_years() | {current_academic_year()}
+    oldest = Attendance.objects.order_by('date').values_list('date', flat=True).first()
+    if oldest:
+        years.update(range(academic_year_of(oldest), current_academic_year()))
+    return sorted(years, reverse=True)
+
+
+# ==================== ARCHIVING ====================
+
+def archive_academic_year(year, batch_size=None, on_progress=None):
+    """
+    Move the attendance of closed academic ``year`` into ArchivedAttendance.
+
+    Rows move in primary-key chunks of ATTENDANCE_ARCHIVE_BATCH_SIZE. Each
+    chunk is copied and deleted from Attendance in one transaction, so an
+    interrupted run resumes where it stopped when called again. Progress is
+    recorded on the year's AttendanceArchive row, whose existence also
+    closes the year to new attendance (see ``validate_open_year``).
+    Attendance summaries count archived rows too, so they do not change.
+    Returns the rows moved by this call.
+    """
+    if year >= current_academic_year():
+        raise ValueError(f'{academic_year_label(year)} has not ended yet and cannot be archived.')
+    batch_size = batch_size or getattr(settings, 'ATTENDANCE_ARCHIVE_BATCH_SIZE', 5000)
+    start, end = academic_year_dates(year)
+    rows = Attendance.objects.filter(date__gte=start, date__lt=end)
+
+    archive, _ = AttendanceArchive.objects.get_or_create(academic_year=year)
+    remaining = rows.count()
+    total = archive.rows_archived + remaining
+    moved = 0
+    while True:
+        chunk = list(rows.order_by('pk').values(*ARCHIVE_FIELDS)[:batch_size])
+        if not chunk:
+            break
+        with transaction.atomic():
+            ArchivedAttendance.objects.bulk_create([
+                ArchivedAttendance(academic_year=year, **row) for row in chunk
+            ])
+            # Deleting through the ORM would take the rows out of the summaries
+            moved_rows = Attendance.objects.filter(pk__in=[row['id'] for row in chunk])
+            moved_rows._raw_delete(moved_rows.db)
+            AttendanceArchive.objects.filter(pk=archive.pk).update(
+                rows_archived=F('rows_archived') + len(chunk)
+            )
+        moved += len(chunk)
+        if on_progress:
+            on_progress((total - remaining + moved) / total)
+
+    AttendanceArchive.objects.filter(pk=archive.pk).update(completed_at=timezone.now())
+    invalidate_dashboard_metrics()
+    return moved
+
+
+def years_to_archive():
+    """Closed academic years that still have rows in the live Attendance table"""
+    current_start, _ = academic_year_dates(current_academic_year())
+    oldest = Attendance.objects.filter(date__lt=current_start).order_by('date').values_list('date', flat=True).first()
+    if oldest is None:
+        return []
+    return list(range(academic_year_of(oldest), current_academic_year()))
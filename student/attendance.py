@@ -0,0 +1,332 @@
+from collections import Counter, defaultdict
+
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FilteredRelation, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils import timezone
+
+from .archival import range_reaches_archive, validate_open_year
+from .metrics import invalidate_dashboard_metrics
+from .models import (
+    Student, Course, Enrollment, Attendance, AttendanceSummary, ArchivedAttendance, _count_subquery,
+)
+
+# Annotation name for each attendance status
+STATUS_ANNOTATIONS = {
+    'P': 'attendance_present',
+    'L': 'attendance_late',
+    'A': 'attendance_absent',
+    'E': 'attendance_excused',
+}
+
+# Public sort keys accepted by the report mapped to the underlying ordering
+REPORT_SORTS = {
+    'name': 'name',
+    'roll_number': 'roll_number',
+    'total': 'attendance_total',
+    'present': 'attendance_present',
+    'late': 'attendance_late',
+    'absent': 'attendance_absent',
+    'excused': 'attendance_excused',
+    'percentage': 'attendance_percentage',
+}
+
+
+def attendance_condition(course=None, date_from=None, date_to=None, prefix='attendances__'):
+    """Build the Q object restricting which attendance rows are counted"""
+    condition = Q()
+    if course:
+        condition &= Q(**{f'{prefix}course': course})
+    if date_from:
+        condition &= Q(**{f'{prefix}date__gte': date_from})
+    if date_to:
+        condition &= Q(**{f'{prefix}date__lte': date_to})
+    return condition
+
+
+def _percentage_expression():
+    return Case(
+        When(attendance_total=0, then=Value(0.0)),
+        default=Round(
+            Cast('attendance_present', FloatField()) * 100 / F('attendance_total'),
+            2,
+        ),
+        output_field=FloatField(),
+    )
+
+
+def annotate_attendance(queryset, course=None, date_from=None, date_to=None):
+    """
+    Annotate a Student queryset with attendance totals, per-status counts and
+    the present percentage.
+
+    Without a date range the counts come from the AttendanceSummary table (one
+    joined row per student); a date range falls back to counting the raw
+    Attendance rows in a single grouped query.
+    """
+    if date_from or date_to:
+        return _annotate_from_attendance(queryset, course, date_from, date_to)
+
+    summary = Q(attendance_summaries__course=course) if course else Q(attendance_summaries__course__isnull=True)
+    counts = {'attendance_total': Coalesce(F('attendance_summary__total'), 0)}
+    for status, name in STATUS_ANNOTATIONS.items():
+        field = AttendanceSummary.STATUS_FIELDS[status]
+        counts[name] = Coalesce(F(f'attendance_summary__{field}'), 0)
+
+    return queryset.annotate(
+        attendance_summary=FilteredRelation('attendance_summaries', condition=summary)
+    ).annotate(**counts).annotate(attendance_percentage=_percentage_expression())
+
+
+def _annotate_from_attendance(queryset, course=None, date_from=None, date_to=None):
+    condition = attendance_condition(course, date_from, date_to)
+    counts = {'attendance_total': Count('attendances', filter=condition)}
+    for status, name in STATUS_ANNOTATIONS.items():
+        counts[name] = Count('attendances', filter=condition & Q(attendances__status=status))
+    
+    if range_reaches_archive(date_from, date_to):
+        # Add the archived years the range covers; subqueries, so the join above isn't multiplied
+        archived = ArchivedAttendance.objects.filter(attendance_condition(course, date_from, date_to, prefix=''))
+        counts['attendance_total'] += _count_subquery(archived, 'student')
+        for status, name in STATUS_ANNOTATIONS.items():
+            counts[name] += _count_subquery(archived.filter(status=status), 'student')
+
+    return queryset.annotate(**counts).annotate(attendance_percentage=_percentage_expression())
+
+
+def build_attendance_report(students=None, course=None, date_from=None, date_to=None,
+                            sort='name', page=None, per_page=50):
+    """
+    Return one page of the attendance report.
+
+    Each student in the page carries the annotations added by
+    ``annotate_attendance``. ``sort`` accepts any key of ``REPORT_SORTS``,
+    optionally prefixed with ``-`` for descending order.
+    """
+    if students is None:
+        students = Student.objects.filter(is_active=True)
+
+    descending = sort.startswith('-')
+    ordering = REPORT_SORTS.get(sort.lstrip('-'), 'name')
+    if descending:
+        ordering = f'-{ordering}'
+
+    report = annotate_attendance(students, course, date_from, date_to).order_by(ordering, 'pk')
+    paginator = Paginator(report, per_page)
+    return paginator.get_page(page)
+
+
+# ==================== ATTENDANCE SUMMARY MAINTENANCE ====================
+
+SUMMARY_COUNT_FIELDS = ['total', 'present', 'absent', 'late', 'excused']
+
+
+def _summary_scopes(course_id):
+    """Course ids of the summary rows an attendance row contributes to (None = overall)"""
+    return [None, course_id] if course_id else [None]
+
+
+def _summary_rows(student_id, course_id):
+    if course_id is None:
+        return AttendanceSummary.objects.filter(student_id=student_id, course__isnull=True)
+    return AttendanceSummary.objects.filter(student_id=student_id, course_id=course_id)
+
+
+def apply_attendance_delta(student_id, course_id, status, delta):
+    """
+    Add ``delta`` (+1 or -1) to the overall and per-course summary rows of a
+    student for the given attendance status.
+    """
+    field = AttendanceSummary.STATUS_FIELDS[status]
+    changes = {'total': F('total') + delta, field: F(field) + delta}
+    for scope in _summary_scopes(course_id):
+        rows = _summary_rows(student_id, scope)
+        # Decrements never create rows: the student may be mid-deletion
+        if rows.update(**changes) or delta < 0:
+            continue
+        try:
+            with transaction.atomic():
+                AttendanceSummary.objects.create(
+                    student_id=student_id, course_id=scope, total=delta, **{field: delta}
+                )
+        except IntegrityError:
+            # Created concurrently; apply the delta to that row instead
+            rows.update(**changes)
+
+
+def apply_attendance_deltas(course_id, changes):
+    """
+    Apply many status changes of one course to the summaries at once.
+
+    ``changes`` maps student ids to ``(old_status, new_status)``, with
+    ``old_status`` None for a new attendance row. Missing summary rows are
+    created empty first, then students sharing the same change are updated
+    together, so the query count does not grow with the number of students.
+    """
+    deltas = defaultdict(list)
+    for student_id, (old_status, new_status) in changes.items():
+        if old_status == new_status:
+            continue
+        delta = Counter({AttendanceSummary.STATUS_FIELDS[new_status]: 1})
+        if old_status is None:
+            delta['total'] += 1
+        else:
+            delta[AttendanceSummary.STATUS_FIELDS[old_status]] -= 1
+        deltas[tuple(sorted(delta.items()))].append(student_id)
+    if not deltas:
+        return
+
+    new_rows = [student_id for student_id, (old_status, _) in changes.items() if old_status is None]
+    for scope in _summary_scopes(course_id):
+        AttendanceSummary.objects.bulk_create(
+            [AttendanceSummary(student_id=student_id, course_id=scope) for student_id in new_rows],
+            ignore_conflicts=True,
+        )
+        if scope is None:
+            summaries = AttendanceSummary.objects.filter(course__isnull=True)
+        else:
+            summaries = AttendanceSummary.objects.filter(course_id=scope)
+        for delta, student_ids in deltas.items():
+            summaries.filter(student_id__in=student_ids).update(
+                **{field: F(field) + amount for field, amount in delta}
+            )
+
+
+def _summary_counts(attendances, group_by):
+    """Yield per-status counts of ``attendances`` grouped by ``group_by``"""
+    counts = {'total': Count('pk')}
+    for status, field in AttendanceSummary.STATUS_FIELDS.items():
+        counts[field] = Count('pk', filter=Q(status=status))
+    return attendances.order_by().values(*group_by).annotate(**counts).iterator()
+
+
+def compute_attendance_summary(student_ids=None):
+    """
+    Count raw Attendance and ArchivedAttendance rows into summary values.
+
+    Returns a dict mapping ``(student_id, course_id)`` (course_id None for the
+    overall row) to a dict of counts.
+    """
+    expected = defaultdict(lambda: dict.fromkeys(SUMMARY_COUNT_FIELDS, 0))
+    for model in (Attendance, ArchivedAttendance):
+        attendances = model.objects.all()
+        if student_ids is not None:
+            attendances = attendances.filter(student_id__in=student_ids)
+
+        rows = [
+            *_summary_counts(attendances, ['student_id']),
+            *_summary_counts(attendances.filter(course__isnull=False), ['student_id', 'course_id']),
+        ]
+        for row in rows:
+            counts = expected[(row['student_id'], row.get('course_id'))]
+            for field in SUMMARY_COUNT_FIELDS:
+                counts[field] += row[field]
+    return dict(expected)
+
+
+def rebuild_attendance_summary(student_ids=None, batch_size=1000):
+    """
+    Recompute the summary rows of ``student_ids`` (or of every student) from
+    the raw Attendance rows in a few set-based queries.
+    """
+    with transaction.atomic():
+        summaries = AttendanceSummary.objects.all()
+        if student_ids is not None:
+            summaries = summaries.filter(student_id__in=student_ids)
+        summaries.delete()
+
+        rows = [
+            AttendanceSummary(student_id=student_id, course_id=course_id, **counts)
+            for (student_id, course_id), counts in compute_attendance_summary(student_ids).items()
+        ]
+        AttendanceSummary.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def verify_attendance_summary(student_ids=None):
+    """
+    Compare the stored summary with the raw Attendance rows.
+
+    Returns a list of ``(student_id, course_id, stored, expected)`` for every
+    mismatching row; ``stored`` or ``expected`` is None when the row is
+    missing on that side.
+    """
+    expected = compute_attendance_summary(student_ids)
+    summaries = AttendanceSummary.objects.all()
+    if student_ids is not None:
+        summaries = summaries.filter(student_id__in=student_ids)
+
+    mismatches = []
+    for row in summaries.values('student_id', 'course_id', *SUMMARY_COUNT_FIELDS).iterator():
+        key = (row['student_id'], row['course_id'])
+        stored = {field: row[field] for field in SUMMARY_COUNT_FIELDS}
+        counts = expected.pop(key, None)
+        # A zeroed row is equivalent to a missing one
+        if counts != stored and (counts is not None or any(stored.values())):
+            mismatches.append((*key, stored, counts))
+    for key, counts in expected.items():
+        mismatches.append((*key, None, counts))
+    return mismatches
+
+
+# ==================== BULK MARKING ====================
+
+def mark_attendance_bulk(course, date, statuses, marked_by=None):
+    """
+    Record attendance for a course roster in one round-trip.
+
+    ``statuses`` maps student ids to attendance status codes. Students not
+    actively enrolled in the course are skipped, as are unknown status codes.
+    Dates in an archived academic year raise ValidationError.
+    All rows are upserted with a single ``INSERT ... ON CONFLICT`` on the
+    (student, course, date) key inside one transaction, and the summaries of
+    the affected students are adjusted by the status changes in the same
+    transaction. The course row is locked for the duration, so concurrent
+    markings of one course are applied one after the other.
+
+    Returns ``(saved, skipped)`` where ``skipped`` lists the rejected ids.
+    """
+    validate_open_year(date)
+    roster = set(
+        Enrollment.objects.filter(course=course, is_active=True).values_list('student_id', flat=True)
+    )
+    if marked_by is not None and not marked_by.is_authenticated:
+        marked_by = None
+
+    now = timezone.now()
+    records = []
+    skipped = []
+    for student_id, status in statuses.items():
+        if student_id not in roster or status not in AttendanceSummary.STATUS_FIELDS:
+            skipped.append(student_id)
+            continue
+        records.append(Attendance(
+            student_id=student_id, course=course, date=date,
+            status=status, marked_by=marked_by, created_at=now,
+        ))
+
+    if records:
+        with transaction.atomic():
+            # Row locks cannot cover rows that do not exist yet, so lock the
+            # course: two rosters marked at once would both count a new row
+            Course.objects.select_for_update().get(pk=course.pk)
+            # The statuses being replaced, to turn the upsert into summary deltas
+            previous = dict(
+                Attendance.objects.select_for_update()
+                .filter(course=course, date=date, student_id__in=[record.student_id for record in records])
+                .values_list('student_id', 'status')
+            )
+            Attendance.objects.bulk_create(
+                records,
+                update_conflicts=True,
+                unique_fields=['student', 'course', 'date'],
+                update_fields=['status', 'marked_by'],
+            )
+            # bulk_create() sends no signals, so update the summaries directly
+            apply_attendance_deltas(course.pk, {
+                record.student_id: (previous.get(record.student_id), record.status) for record in records
+            })
+        invalidate_dashboard_metrics()
+
+    return len(records), skipped
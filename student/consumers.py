@@ -0,0 +1,39 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .notifications import notification_group, unread_count
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """Push new notifications and the unread count to the signed-in user"""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        self.group_name = notification_group(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send_json({
+            'type': 'unread_count',
+            'unread_count': await database_sync_to_async(unread_count)(user.pk),
+        })
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notification_created(self, event):
+        await self.send_json({
+            'type': 'notification',
+            'notification': event['notification'],
+            'unread_count': event['unread_count'],
+        })
+
+    async def notification_read(self, event):
+        await self.send_json({
+            'type': 'unread_count',
+            'unread_count': event['unread_count'],
+        })
@@ -0,0 +1,133 @@
+import csv
+import io
+import tempfile
+import zlib
+
+from django.conf import settings
+from django.utils import timezone
+from openpyxl import Workbook
+
+# Columns written by the CSV export, as (header, field) pairs
+CSV_COLUMNS = [
+    ('Name', 'name'),
+    ('Roll Number', 'roll_number'),
+    ('Email', 'email'),
+    ('Phone', 'phone'),
+    ('Marks', 'marks'),
+    ('Grade', 'grade'),
+    ('City', 'city'),
+    ('State', 'state'),
+]
+
+
+def export_chunk_size():
+    return getattr(settings, 'STUDENT_EXPORT_CHUNK_SIZE', 2000)
+
+
+def iter_students_csv(students, columns=CSV_COLUMNS, chunk_size=None):
+    """
+    Yield the CSV export of ``students`` as text blocks.
+
+    Rows are read with a server-side ``values_list`` iterator and written out
+    ``chunk_size`` rows at a time, so memory stays bounded however large the
+    queryset is.
+    """
+    chunk_size = chunk_size or export_chunk_size()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in columns])
+
+    rows = students.values_list(*[field for _, field in columns])
+    for count, row in enumerate(rows.iterator(chunk_size=chunk_size), start=1):
+        writer.writerow(row)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def gzip_stream(chunks):
+    """Gzip-compress a stream of text chunks"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Columns available to the Excel export, keyed by the name used in ?columns=
+EXCEL_COLUMNS = {
+    'name': ('Name', 'name'),
+    'roll_number': ('Roll Number', 'roll_number'),
+    'email': ('Email', 'email'),
+    'phone': ('Phone', 'phone'),
+    'gender': ('Gender', 'gender'),
+    'date_of_birth': ('Date of Birth', 'date_of_birth'),
+    'marks': ('Marks', 'marks'),
+    'grade': ('Grade', 'grade'),
+    'class_name': ('Class', 'class_name'),
+    'section': ('Section', 'section'),
+    'admission_date': ('Admission Date', 'admission_date'),
+    'address': ('Address', 'address'),
+    'city': ('City', 'city'),
+    'state': ('State', 'state'),
+    'postal_code': ('Postal Code', 'postal_code'),
+    'country': ('Country', 'country'),
+    'guardian_name': ('Guardian Name', 'guardian_name'),
+    'guardian_phone': ('Guardian Phone', 'guardian_phone'),
+    'guardian_email': ('Guardian Email', 'guardian_email'),
+    'guardian_relation': ('Guardian Relation', 'guardian_relation'),
+    'created_at': ('Created At', 'created_at'),
+}
+
+DEFAULT_EXCEL_COLUMNS = ['name', 'roll_number', 'email', 'phone', 'marks', 'grade', 'city', 'state', 'created_at']
+
+
+def excel_columns(requested=None):
+    """Return the valid column keys from a comma separated ``requested`` string"""
+    if not requested:
+        return list(DEFAULT_EXCEL_COLUMNS)
+    columns = [key.strip() for key in requested.split(',') if key.strip() in EXCEL_COLUMNS]
+    return columns or list(DEFAULT_EXCEL_COLUMNS)
+
+
+def _excel_value(value):
+    # Excel has no timezone support
+    if hasattr(value, 'tzinfo') and value.tzinfo is not None:
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+    return '' if value is None else value
+
+
+def write_students_excel(students, columns=None, output=None, chunk_size=None, on_progress=None):
+    """
+    Write ``students`` to an .xlsx file using openpyxl's write-only mode.
+
+    Rows come from a ``values_list`` iterator and are streamed straight into
+    the worksheet, so memory stays flat regardless of the number of rows.
+    ``output`` is a path or binary file object; a temporary file is created
+    and returned (rewound) when it is omitted. ``on_progress`` is called
+    after every chunk with the fraction of rows written.
+    """
+    columns = columns or list(DEFAULT_EXCEL_COLUMNS)
+    chunk_size = chunk_size or export_chunk_size()
+    if output is None:
+        output = tempfile.TemporaryFile()
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Students')
+    ws.append([EXCEL_COLUMNS[key][0] for key in columns])
+
+    total = students.count() if on_progress else 0
+    rows = students.values_list(*[EXCEL_COLUMNS[key][1] for key in columns])
+    for count, row in enumerate(rows.iterator(chunk_size=chunk_size), start=1):
+        ws.append([_excel_value(value) for value in row])
+        if total and count % chunk_size == 0:
+            on_progress(count / total)
+
+    wb.save(output)
+    if hasattr(output, 'seek'):
+        output.seek(0)
+    return output
@@ -0,0 +1,39 @@
+from .search import search_students
+
+STUDENT_SORTS = ['name', '-name', 'roll_number', '-roll_number', 'marks', '-marks', 'created_at', '-created_at']
+
+
+def filter_students(students, params):
+    """
+    Apply the student_list search, grade, marks range and sort parameters
+    to a Student queryset.
+
+    Returns the filtered queryset and a dict of the parameter values that
+    were read, so views can echo them back into templates and links.
+    """
+    search_query = params.get('search', '')
+    if search_query:
+        students = search_students(students, search_query)
+
+    grade_filter = params.get('grade', '')
+    if grade_filter:
+        students = students.filter(grade=grade_filter)
+
+    marks_min = params.get('marks_min', '')
+    marks_max = params.get('marks_max', '')
+    if marks_min:
+        students = students.filter(marks__gte=marks_min)
+    if marks_max:
+        students = students.filter(marks__lte=marks_max)
+
+    sort_by = params.get('sort', '-created_at')
+    if sort_by in STUDENT_SORTS:
+        students = students.order_by(sort_by)
+
+    return students, {
+        'search_query': search_query,
+        'grade_filter': grade_filter,
+        'marks_min': marks_min,
+        'marks_max': marks_max,
+        'sort_by': sort_by,
+    }
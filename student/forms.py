@@ -89,3 +89,8 @@ class StudentImportForm(forms.Form):
             'accept': '.csv'
         })
     )
+    upsert = forms.BooleanField(
+        required=False,
+        label='Update existing students',
+        help_text='Rows with an existing roll number update that student instead of being rejected',
+    )
@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .metrics import invalidate_dashboard_metrics
+from .models import Student
+
+
+def gradebook_students(class_name, section=None):
+    """Active students of a class (and section), in roll-number order"""
+    students = Student.objects.filter(is_active=True, class_name=class_name)
+    if section:
+        students = students.filter(section=section)
+    return students.order_by('roll_number')
+
+
+def parse_marks(value):
+    """Return ``value`` as marks, or raise ValueError with the message to show"""
+    try:
+        marks = float(str(value).strip())
+    except ValueError:
+        raise ValueError('Marks must be a number.')
+    if not 0 <= marks <= 100:
+        raise ValueError('Marks must be between 0 and 100.')
+    return marks
+
+
+def save_marks_bulk(marks, students=None):
+    """
+    Record marks for many students at once.
+
+    ``marks`` maps student ids to raw marks (numbers or strings). The
+    students are loaded from ``students`` (all active students by default)
+    in one query, and every value is validated. The changed rows are then
+    written with a single ``bulk_update`` inside one transaction, which
+    also recomputes their grades, so the query count does not grow with
+    the class size.
+
+    Returns ``(saved, errors)`` where ``errors`` maps each rejected id to
+    its message.
+    """
+    if students is None:
+        students = Student.objects.filter(is_active=True)
+    loaded = {
+        student.pk: student
+        for student in students.filter(pk__in=list(marks)).only('pk', 'marks', 'grade')
+    }
+
+    now = timezone.now()
+    changed = []
+    errors = {}
+    for student_id, value in marks.items():
+        student = loaded.get(student_id)
+        if student is None:
+            errors[student_id] = 'No such student in this class.'
+            continue
+        try:
+            new_marks = parse_marks(value)
+        except ValueError as e:
+            errors[student_id] = str(e)
+            continue
+        if new_marks != student.marks:
+            student.marks = new_marks
+            # bulk_update() skips auto_now
+            student.updated_at = now
+            changed.append(student)
+
+    if changed:
+        with transaction.atomic():
+            Student.objects.bulk_update(changed, ['marks', 'updated_at'])
+        invalidate_dashboard_metrics()
+
+    return len(changed), errors
@@ -0,0 +1,215 @@
+import csv
+import io
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .metrics import invalidate_dashboard_metrics
+from .models import Student, calculate_grade
+from .search import get_search_backend
+
+REQUIRED_COLUMNS = ['name', 'roll_number', 'email', 'marks']
+# Columns an upsert copies onto the existing student, when present in the file
+UPDATE_COLUMNS = ['name', 'email', 'phone', 'marks']
+
+
+class ImportResult:
+    """Outcome of a CSV import"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+
+    def add_error(self, line, row, message):
+        self.errors.append((line, (row or {}).get('roll_number', ''), message))
+
+    def error_report(self):
+        """Return the per-row errors as CSV text"""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Line', 'Roll Number', 'Error'])
+        writer.writerows(self.errors)
+        return output.getvalue()
+
+
+class StudentImporter:
+    """
+    Stream a CSV upload into the Student table.
+
+    Rows are decoded incrementally, validated against the roll numbers and
+    emails already in the database (loaded once up front), and written with
+    ``bulk_create``/``bulk_update`` in batches of ``batch_size`` rows, each
+    batch in its own transaction. With ``upsert`` enabled, rows whose roll
+    number already exists update that student instead of being rejected.
+    ``on_progress`` is called after each batch with the fraction of the
+    file consumed so far.
+    """
+
+    def __init__(self, batch_size=None, upsert=False, on_progress=None):
+        self.batch_size = batch_size or getattr(settings, 'STUDENT_IMPORT_BATCH_SIZE', 1000)
+        self.upsert = upsert
+        self.on_progress = on_progress
+        self.update_fields = []
+        self.result = ImportResult()
+
+    def run(self, uploaded_file):
+        # Roll number -> (pk, email) and email -> roll number for every existing student
+        existing = {}
+        emails = {}
+        for pk, roll_number, email in Student.objects.values_list('pk', 'roll_number', 'email').iterator():
+            existing[roll_number] = (pk, email)
+            emails[email.lower()] = roll_number
+
+        stream = io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+        try:
+            reader = csv.DictReader(stream)
+            missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+            if missing:
+                raise ValidationError(f'Missing required columns: {", ".join(missing)}')
+            # Leave fields the file has no column for untouched on upsert
+            self.update_fields = [column for column in UPDATE_COLUMNS if column in reader.fieldnames]
+            if 'marks' in self.update_fields:
+                self.update_fields.append('grade')
+            self.update_fields.append('updated_at')
+
+            to_create = []
+            to_update = []
+            seen = set()
+            for row in reader:
+                # Line 1 is the header
+                line = reader.line_num
+                try:
+                    student = self._build_student(row)
+                except ValidationError as e:
+                    self.result.add_error(line, row, '; '.join(e.messages))
+                    continue
+
+                if student.roll_number in seen:
+                    self.result.add_error(line, row, 'Duplicate roll number in file.')
+                    continue
+
+                email_owner = emails.get(student.email.lower())
+                if email_owner is not None and email_owner != student.roll_number:
+                    self.result.add_error(line, row, 'A student with this email already exists.')
+                    continue
+
+                if student.roll_number in existing:
+                    if not self.upsert:
+                        self.result.add_error(line, row, 'A student with this roll number already exists.')
+                        continue
+                    pk, old_email = existing[student.roll_number]
+                    student.pk = pk
+                    # bulk_update() does not run auto_now
+                    student.updated_at = timezone.now()
+                    emails.pop(old_email.lower(), None)
+                    to_update.append((line, student))
+                else:
+                    to_create.append((line, student))
+
+                seen.add(student.roll_number)
+                emails[student.email.lower()] = student.roll_number
+
+                if len(to_create) >= self.batch_size:
+                    self._flush_creates(to_create)
+                    to_create = []
+                    self._report_progress(uploaded_file)
+                if len(to_update) >= self.batch_size:
+                    self._flush_updates(to_update)
+                    to_update = []
+                    self._report_progress(uploaded_file)
+
+            self._flush_creates(to_create)
+            self._flush_updates(to_update)
+        finally:
+            # Leave the underlying upload open for Django to clean up
+            stream.detach()
+
+        # bulk_create()/bulk_update() do not send model signals
+        invalidate_dashboard_metrics()
+        return self.result
+
+    def _report_progress(self, uploaded_file):
+        if self.on_progress and uploaded_file.size:
+            self.on_progress(min(uploaded_file.file.tell() / uploaded_file.size, 1.0))
+
+    def _build_student(self, row):
+        errors = []
+        name = (row.get('name') or '').strip()
+        if not name:
+            errors.append('Name is required.')
+        self._check_length('name', name, 'Name', errors)
+
+        roll_number = None
+        try:
+            roll_number = int((row.get('roll_number') or '').strip())
+            # The column's integer range, so one bad row cannot fail its whole batch
+            Student._meta.get_field('roll_number').run_validators(roll_number)
+        except ValueError:
+            errors.append('Roll number must be an integer.')
+        except ValidationError:
+            errors.append('Roll number is out of range.')
+
+        email = (row.get('email') or '').strip()
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors.append('Enter a valid email address.')
+        self._check_length('email', email, 'Email', errors)
+
+        marks = None
+        try:
+            marks = float((row.get('marks') or '').strip())
+            if not 0 <= marks <= 100:
+                errors.append('Marks must be between 0 and 100.')
+        except ValueError:
+            errors.append('Marks must be a number.')
+
+        phone = (row.get('phone') or '').strip() or None
+        self._check_length('phone', phone, 'Phone number', errors)
+
+        if errors:
+            raise ValidationError(errors)
+
+        return Student(
+            name=name,
+            roll_number=roll_number,
+            email=email,
+            phone=phone,
+            marks=marks,
+            grade=calculate_grade(marks),
+        )
+
+    def _check_length(self, field_name, value, label, errors):
+        max_length = Student._meta.get_field(field_name).max_length
+        if value and len(value) > max_length:
+            errors.append(f'{label} must be at most {max_length} characters.')
+
+    def _flush_creates(self, batch):
+        if not batch:
+            return
+        try:
+            with transaction.atomic():
+                students = Student.objects.bulk_create([student for _, student in batch])
+                # bulk_create() sends no signals, so index the batch here
+                get_search_backend().index(students)
+            self.result.created += len(batch)
+        except DatabaseError as e:
+            for line, student in batch:
+                self.result.add_error(line, {'roll_number': student.roll_number}, f'Batch failed: {e}')
+
+    def _flush_updates(self, batch):
+        if not batch:
+            return
+        try:
+            with transaction.atomic():
+                students = [student for _, student in batch]
+                Student.objects.bulk_update(students, self.update_fields)
+                get_search_backend().index(students)
+            self.result.updated += len(batch)
+        except DatabaseError as e:
+            for line, student in batch:
+                self.result.add_error(line, {'roll_number': student.roll_number}, f'Batch failed: {e}')
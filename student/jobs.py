@@ -0,0 +1,285 @@
+import gzip
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.http import QueryDict
+from django.utils import timezone
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from .exports import excel_columns, write_students_excel
+from .filters import filter_students
+from .importers import StudentImporter
+from .models import Announcement, Assignment, Job, Student
+from .notifications import (
+    announcement_recipients, assignment_recipients, fan_out, grade_notifications,
+    prune_notifications, send_notification_digests,
+)
+from .removal import remove_students
+from .reports import (
+    render_student_report, report_card_data, class_report_students,
+    write_reports_zip, write_reports_pdf,
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register ``func(job)`` as the handler for jobs of ``kind``"""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def set_progress(job, fraction):
+    """Persist a job's progress, given as a fraction between 0 and 1"""
+    progress = max(0, min(int(fraction * 100), 100))
+    if progress != job.progress:
+        job.progress = progress
+        Job.objects.filter(pk=job.pk).update(progress=progress)
+
+
+def run_job(job_id):
+    """Execute a pending job; called by the backends"""
+    # Claim the job atomically so it never runs twice
+    claimed = Job.objects.filter(pk=job_id, status='PENDING').update(
+        status='RUNNING', started_at=timezone.now()
+    )
+    job = Job.objects.get(pk=job_id)
+    if not claimed:
+        return job
+
+    handler = JOB_HANDLERS.get(job.kind)
+
+    try:
+        if handler is None:
+            raise ValueError(f'No handler registered for job kind "{job.kind}"')
+        handler(job)
+    except Exception as e:
+        logger.exception('Job %s (%s) failed', job.pk, job.kind)
+        job.status = 'FAILED'
+        # The traceback goes to the log only; job.error is shown to the submitter
+        job.error = str(e) or 'The job failed.'
+    else:
+        job.status = 'SUCCESS'
+        job.progress = 100
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+class ThreadPoolBackend:
+    """Run jobs on a thread pool inside the web process"""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'JOB_WORKERS', 4),
+            thread_name_prefix='job',
+        )
+
+    def submit(self, job):
+        self.executor.submit(self._run, job.pk)
+
+    @staticmethod
+    def _run(job_id):
+        close_old_connections()
+        try:
+            run_job(job_id)
+        finally:
+            close_old_connections()
+
+
+class CeleryBackend:
+    """Send jobs to a Celery queue (see student.tasks)"""
+
+    def submit(self, job):
+        from .tasks import run_job_task
+
+        run_job_task.delay(job.pk)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the backend configured by the JOB_BACKEND setting"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_path = getattr(settings, 'JOB_BACKEND', 'student.jobs.ThreadPoolBackend')
+            _backend = import_string(backend_path)()
+    return _backend
+
+
+def visible_jobs(user, job_ids=()):
+    """
+    Jobs ``user`` may see: staff see every job, signed-in users their own,
+    and anonymous users only the unowned jobs in ``job_ids``.
+    """
+    if user.is_staff:
+        return Job.objects.all()
+    if user.is_authenticated:
+        return Job.objects.filter(created_by=user)
+    return Job.objects.filter(created_by__isnull=True, pk__in=job_ids)
+
+
+def enqueue(kind, params=None, user=None, input_file=None):
+    """Create a job and submit it once the current transaction commits"""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind "{kind}"')
+
+    job = Job.objects.create(
+        kind=kind,
+        params=params or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    if input_file is not None:
+        job.input_file.save(input_file.name, input_file)
+
+    transaction.on_commit(lambda: get_backend().submit(job))
+    return job
+
+
+# ==================== JOB HANDLERS ====================
+
+@job_handler('import_students')
+def import_students_job(job):
+    importer = StudentImporter(
+        upsert=job.params.get('upsert', False),
+        on_progress=lambda fraction: set_progress(job, fraction),
+    )
+    with job.input_file.open('rb'):
+        result = importer.run(job.input_file)
+
+    job.message = (
+        f'Imported {result.created} new and updated {result.updated} students. '
+        f'{len(result.errors)} errors.'
+    )
+    if result.errors:
+        job.result_file.save(
+            f'import_errors_{job.pk}.csv',
+            ContentFile(result.error_report().encode('utf-8')),
+            save=False,
+        )
+
+
+@job_handler('export_excel')
+def export_excel_job(job):
+    filters = QueryDict(job.params.get('query', ''))
+    students, _ = filter_students(Student.objects.filter(is_active=True), filters)
+    columns = excel_columns(filters.get('columns'))
+
+    with tempfile.TemporaryFile() as output:
+        write_students_excel(
+            students, columns, output=output,
+            on_progress=lambda fraction: set_progress(job, fraction),
+        )
+        job.result_file.save(f'students_{job.pk}.xlsx', File(output), save=False)
+    job.message = 'Excel export is ready.'
+
+
+@job_handler('student_report')
+def student_report_job(job):
+    student = Student.objects.get(pk=job.params['student_id'])
+    job.result_file.save(
+        f'student_report_{student.roll_number}.pdf',
+        ContentFile(render_student_report(student)),
+        save=False,
+    )
+    job.message = f'Report for {student.name} is ready.'
+
+
+@job_handler('class_reports')
+def class_reports_job(job):
+    class_name = job.params.get('class_name')
+    section = job.params.get('section')
+    cards = report_card_data(class_report_students(class_name, section))
+    if not cards:
+        raise ValueError('No active students match this class and section.')
+
+    label = '_'.join(filter(None, ['reports', class_name, section])).replace(' ', '_')
+    with tempfile.TemporaryFile() as output:
+        if job.params.get('format') == 'pdf':
+            write_reports_pdf(cards, output)
+            name = f'{label}.pdf'
+        else:
+            write_reports_zip(cards, output, on_progress=lambda fraction: set_progress(job, fraction))
+            name = f'{label}.zip'
+        output.seek(0)
+        job.result_file.save(name, File(output), save=False)
+    job.message = f'Generated {len(cards)} report cards.'
+
+
+@job_handler('remove_students')
+def remove_students_job(job):
+    archive = job.params.get('archive', False)
+    removed = remove_students(
+        job.params['student_ids'], archive=archive,
+        on_progress=lambda fraction: set_progress(job, fraction),
+    )
+    job.message = f'{"Archived" if archive else "Deleted"} {removed} students.'
+
+
+@job_handler('notify_assignment')
+def notify_assignment_job(job):
+    assignment = Assignment.objects.select_related('course').get(pk=job.params['assignment_id'])
+    sent = fan_out(
+        assignment_recipients(assignment),
+        title=f'New assignment: {assignment.title}',
+        message=f'{assignment.course.code}: due {assignment.due_date:%d %b %Y, %H:%M}.',
+        notification_type='ASSIGNMENT',
+        link=reverse('assignment_detail', args=[assignment.pk]),
+        on_progress=lambda fraction: set_progress(job, fraction),
+    )
+    job.message = f'Notified {sent} students.'
+
+
+@job_handler('notify_announcement')
+def notify_announcement_job(job):
+    announcement = Announcement.objects.get(pk=job.params['announcement_id'])
+    sent = fan_out(
+        announcement_recipients(announcement),
+        title=announcement.title,
+        message=announcement.content[:500],
+        link=reverse('announcement_list'),
+        on_progress=lambda fraction: set_progress(job, fraction),
+    )
+    job.message = f'Notified {sent} students.'
+
+
+@job_handler('notify_grades')
+def notify_grades_job(job):
+    sent = grade_notifications(
+        job.params['submission_ids'],
+        on_progress=lambda fraction: set_progress(job, fraction),
+    )
+    job.message = f'Notified {sent} students.'
+
+
+@job_handler('notification_digest')
+def notification_digest_job(job):
+    job.message = f'Sent {send_notification_digests()} digest emails.'
+
+
+@job_handler('prune_notifications')
+def prune_notifications_job(job):
+    days = job.params.get('days')
+    on_progress = lambda fraction: set_progress(job, fraction)
+    if not job.params.get('archive'):
+        deleted = prune_notifications(days, on_progress=on_progress)
+    else:
+        with tempfile.TemporaryFile() as output:
+            with gzip.open(output, 'wt', encoding='utf-8') as archive:
+                deleted = prune_notifications(days, archive=archive, on_progress=on_progress)
+            job.result_file.save(f'notifications_archive_{job.pk}.jsonl.gz', File(output), save=False)
+    job.message = f'Removed {deleted} read notifications.'
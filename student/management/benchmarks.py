@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from student.models import Student
+
+
+class RollbackBenchmark(Exception):
+    """Raised to discard the synthetic rows created for a run"""
+
+
+class BenchmarkCommand(BaseCommand):
+    """
+    Base for the ``benchmark_*`` commands: ``benchmark(options)`` runs in a
+    transaction that is always rolled back, so the synthetic students seeded
+    for ``--rows`` (default ``default_rows``) never persist. Commands that
+    time an implementation against the one it replaced keep the replaced
+    version as a ``legacy_*`` function, so both run against the same rows.
+    """
+
+    default_rows = 0
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=self.default_rows,
+                            help='Synthetic students to add for the run (rolled back afterwards)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.benchmark(options)
+                raise RollbackBenchmark
+        except RollbackBenchmark:
+            pass
+
+    def benchmark(self, options):
+        raise NotImplementedError
+
+
+def seed_students(rows, name='Benchmark Student', email='bench', batch_size=5000, **fields):
+    """
+    Bulk-create ``rows`` students numbered after the highest existing roll
+    number, with marks cycling through 0-100 and ``fields`` set on every one.
+    Returns a queryset of the new students.
+    """
+    start = (Student.objects.order_by('-roll_number').values_list('roll_number', flat=True).first() or 0) + 1
+    batch = []
+    for i in range(start, start + rows):
+        batch.append(Student(
+            name=f'{name} {i}', roll_number=i, email=f'{email}{i}@example.com', marks=i % 101, **fields,
+        ))
+        if len(batch) == batch_size:
+            Student.objects.bulk_create(batch)
+            batch = []
+    Student.objects.bulk_create(batch)
+    return Student.objects.filter(roll_number__gte=start)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student.archival import academic_year_label, archive_academic_year, years_to_archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Move attendance of closed academic years into the archive table, in chunks. '
+        'Safe to interrupt: running it again resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, action='append', dest='years',
+                            help='Academic year to archive, by the year it starts in (may be repeated; '
+                                 'default: every closed year still in the live table)')
+        parser.add_argument('--batch-size', type=int,
+                            help='Rows moved per transaction (default ATTENDANCE_ARCHIVE_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        years = options['years'] or years_to_archive()
+        if not years:
+            self.stdout.write('Nothing to archive')
+            return
+
+        for year in sorted(years):
+            label = academic_year_label(year)
+            self.stdout.write(f'Archiving {label}')
+            try:
+                moved = archive_academic_year(
+                    year, batch_size=options['batch_size'],
+                    on_progress=lambda fraction: self.stdout.write(f'  {fraction:.0%}'),
+                )
+            except ValueError as e:
+                raise CommandError(e)
+            self.stdout.write(self.style.SUCCESS(f'Archived {moved} attendance rows of {label}'))
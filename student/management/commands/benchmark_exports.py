@@ -0,0 +1,64 @@
+import tempfile
+import time
+import tracemalloc
+
+from openpyxl import Workbook
+
+from student.exports import write_students_excel
+from student.management.benchmarks import BenchmarkCommand, seed_students
+from student.models import Student
+
+
+def legacy_export_excel(students, output):
+    """The original export_excel: a full in-memory workbook built from model instances"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Students"
+    ws.append(['Name', 'Roll Number', 'Email', 'Phone', 'Marks', 'Grade', 'City', 'State', 'Created At'])
+    for student in students:
+        ws.append([
+            student.name,
+            student.roll_number,
+            student.email,
+            student.phone or '',
+            student.marks,
+            student.grade,
+            student.city or '',
+            student.state or '',
+            student.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        ])
+    wb.save(output)
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare peak memory and wall time of the Excel export implementations'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--skip-legacy', action='store_true',
+                            help='Only measure the write-only export')
+
+    def benchmark(self, options):
+        seed_students(
+            options['rows'], phone='9999999999', city='City', state='State',
+            address='Street', guardian_name='Guardian',
+        )
+        self._run(options['skip_legacy'])
+
+    def _run(self, skip_legacy):
+        students = Student.objects.filter(is_active=True)
+        self.stdout.write(f'Exporting {students.count()} students')
+
+        if not skip_legacy:
+            self._measure('legacy (full workbook)', lambda out: legacy_export_excel(students, out))
+        self._measure('write-only', lambda out: write_students_excel(students, output=out))
+
+    def _measure(self, label, export):
+        with tempfile.TemporaryFile() as output:
+            tracemalloc.start()
+            started = time.perf_counter()
+            export(output)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        self.stdout.write(f'{label:<24} {elapsed:8.2f}s  peak {peak / 1024 / 1024:8.1f} MiB')
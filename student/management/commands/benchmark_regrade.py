@@ -0,0 +1,58 @@
+import time
+
+from django.test.utils import override_settings
+
+from student.grading import regrade_students
+from student.management.benchmarks import BenchmarkCommand, seed_students
+from student.models import grade_expression
+
+# Boundaries the benchmark switches to, so most synthetic grades go stale
+SHIFTED_BOUNDARIES = {'A': 85, 'B': 75, 'C': 65, 'D': 50, 'F': 0}
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Compare regrading students one save() at a time with the set-based '
+        'UPDATE ... CASE recomputation after the grade boundaries change'
+    )
+
+    default_rows = 1_000_000
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--sample', type=int, default=2000,
+                            help='Students regraded one by one; the time is extrapolated to --rows')
+        parser.add_argument('--batch-size', type=int,
+                            help='Students per UPDATE (default GRADE_REGRADE_BATCH_SIZE)')
+
+    def benchmark(self, options):
+        started = time.perf_counter()
+        students = seed_students(options['rows'], name='Regrade Student', email='regrade', is_active=False)
+        self.stdout.write(f'Seeded {options["rows"]} students in {time.perf_counter() - started:.1f}s')
+        with override_settings(GRADE_BOUNDARIES=SHIFTED_BOUNDARIES):
+            self._run(students, options)
+
+    def _run(self, students, options):
+        stale = students.exclude(grade=grade_expression()).count()
+        self.stdout.write(f'{stale} of {options["rows"]} grades are stale under the new boundaries')
+
+        sample = list(students.order_by('-pk')[:options['sample']])
+        started = time.perf_counter()
+        for student in sample:
+            student.save()
+        per_row = (time.perf_counter() - started) / max(len(sample), 1)
+        self.stdout.write(
+            f'{"save() per row":<16} {per_row * 1000:8.3f} ms/row  '
+            f'~{per_row * options["rows"]:8.1f}s for {options["rows"]} rows (extrapolated)'
+        )
+
+        started = time.perf_counter()
+        changed = regrade_students(students, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{"UPDATE ... CASE":<16} {elapsed / options["rows"] * 1000:8.3f} ms/row  '
+            f'{elapsed:9.1f}s for {options["rows"]} rows ({changed} changed)'
+        )
+        remaining = students.exclude(grade=grade_expression()).count()
+        if remaining:
+            self.stdout.write(self.style.ERROR(f'{remaining} grades are still stale'))
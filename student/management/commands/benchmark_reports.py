@@ -0,0 +1,34 @@
+import time
+
+from student.management.benchmarks import BenchmarkCommand, seed_students
+from student.models import Student
+from student.reports import iter_rendered_reports, report_card_data, report_workers
+
+
+class Command(BenchmarkCommand):
+    help = 'Measure report card throughput (reports per second) sequentially and across a process pool'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--limit', type=int, default=1000,
+                            help='Maximum number of report cards to render')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Process pool size (defaults to REPORT_WORKERS or the CPU count)')
+
+    def benchmark(self, options):
+        seed_students(options['rows'], class_name='Benchmark', section='A')
+        self._run(options['limit'], options['workers'] or report_workers())
+
+    def _run(self, limit, workers):
+        started = time.perf_counter()
+        cards = report_card_data(Student.objects.filter(is_active=True))[:limit]
+        self.stdout.write(f'Loaded {len(cards)} students in {time.perf_counter() - started:.2f}s')
+        if not cards:
+            return
+
+        for label, pool_size in [('sequential', 1), (f'{workers} processes', workers)]:
+            started = time.perf_counter()
+            for _ in iter_rendered_reports(cards, workers=pool_size):
+                pass
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{label:<16} {elapsed:8.2f}s  {len(cards) / elapsed:8.1f} reports/s')
@@ -0,0 +1,58 @@
+import time
+
+from django.db.models import Q
+
+from student.management.benchmarks import BenchmarkCommand, seed_students
+from student.models import Student
+from student.search import get_search_backend
+
+DEFAULT_TERMS = ['Student 4242', 'bench4242@', '4242', 'Nobody']
+
+
+def legacy_search(students, term):
+    """Substring match on name, roll number and email: the original student_list search"""
+    return students.filter(
+        Q(name__icontains=term) |
+        Q(roll_number__icontains=term) |
+        Q(email__icontains=term)
+    )
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare the substring student search with the configured search backend'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--term', action='append', dest='terms',
+                            help='Search term to time (may be repeated)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs per term; the best time is reported')
+
+    def benchmark(self, options):
+        if options['rows']:
+            seed_students(options['rows'])
+            # bulk_create() skips the signals that keep the index current
+            get_search_backend().rebuild()
+        self._run(options['terms'] or DEFAULT_TERMS, options['repeat'])
+
+    def _run(self, terms, repeat):
+        students = Student.objects.filter(is_active=True)
+        backend = get_search_backend()
+        self.stdout.write(f'Searching {students.count()} students with {type(backend).__name__}')
+
+        for term in terms:
+            self.stdout.write(f'"{term}"')
+            self._measure('substring', lambda: legacy_search(students, term), repeat)
+            self._measure('backend', lambda: backend.search(students, term), repeat)
+
+    def _measure(self, label, search, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            # Same shape as a student_list page: a count plus the first rows
+            queryset = search().order_by('-created_at')
+            count = queryset.count()
+            list(queryset[:20])
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(f'  {label:<10} {best * 1000:9.1f} ms  {count} matches')
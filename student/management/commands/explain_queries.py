@@ -0,0 +1,113 @@
+import re
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from student.models import (
+    Student, Enrollment, Attendance, AttendanceSummary, Notification, Announcement,
+)
+from student.search import get_search_backend, roll_number_prefix_q
+
+# Plan lines that read a whole table or index
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!.*\bVIRTUAL TABLE\b)'),
+    'postgresql': re.compile(r'\b(Seq|Index|Index Only) Scan\b(?!.*\bIndex Cond\b)'),
+}
+
+# An index scan feeding a LIMIT only reads the first rows, which is fine
+INDEX_SCAN = re.compile(r'\bUSING (COVERING )?INDEX\b|\bIndex( Only)? Scan\b')
+
+# First line of a plan node; PostgreSQL puts a node's conditions on the
+# indented lines that follow it
+NODE_START = re.compile(r'^(\S|\s*->)')
+
+
+def plan_nodes(plan):
+    """Split an EXPLAIN plan into one line per node, details included"""
+    nodes = []
+    for line in plan.splitlines():
+        if NODE_START.match(line) or not nodes:
+            nodes.append(line.strip())
+        else:
+            nodes[-1] += f'  {line.strip()}'
+    return nodes
+
+
+def partial_index_names():
+    """Partial indexes only hold the rows a query wants, so scanning one is fine"""
+    return {
+        index.name
+        for model in apps.get_app_config('student').get_models()
+        for index in model._meta.indexes
+        if index.condition is not None
+    }
+
+
+def is_full_scan(line, pattern, limited, partial_indexes):
+    if not pattern.search(line):
+        return False
+    if limited and INDEX_SCAN.search(line):
+        return False
+    return not any(re.search(rf'\b{name}\b', line) for name in partial_indexes)
+
+
+def canonical_queries():
+    """The listing and lookup queries the app runs most, keyed by a short name"""
+    today = timezone.localdate()
+    students = Student.objects.filter(is_active=True)
+    return {
+        'student_list (newest)': students.order_by('-created_at')[:10],
+        'student_list (by marks)': students.order_by('marks')[:10],
+        'student_list (by name)': students.order_by('name')[:10],
+        'student search (roll number)': students.filter(roll_number_prefix_q('12')).order_by(),
+        'student search (email)': get_search_backend().search_email_prefix(students, 'ab@').order_by(),
+        'student search (name)': get_search_backend().search_text(students, 'kumar').order_by(),
+        'attendance_list': Attendance.objects.order_by('-date', '-id')[:20],
+        'attendance by student and status': Attendance.objects.filter(student_id=1, status='P'),
+        'attendance by date': Attendance.objects.filter(date=today),
+        'attendance by course and date': Attendance.objects.filter(course_id=1, date=today),
+        'course roster': Enrollment.objects.filter(course_id=1, is_active=True),
+        'attendance summary (overall)': AttendanceSummary.objects.filter(student_id=1, course__isnull=True),
+        'notification_list': Notification.objects.filter(user_id=1).order_by('-created_at')[:20],
+        'unread notifications': Notification.objects.filter(user_id=1, is_read=False),
+        'announcement_list': Announcement.objects.filter(is_active=True).order_by('-priority', '-created_at'),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the canonical queries and report any that still scan a whole table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', action='store_true',
+                            help='Print the full plan of every query')
+        parser.add_argument('--strict', action='store_true',
+                            help='Exit non-zero when a full scan is found')
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'Full scan detection is not implemented for {connection.vendor}')
+
+        partial_indexes = partial_index_names()
+        full_scans = []
+        for name, queryset in canonical_queries().items():
+            plan = queryset.explain()
+            limited = queryset.query.high_mark is not None
+            scans = [
+                node for node in plan_nodes(plan)
+                if is_full_scan(node, pattern, limited, partial_indexes)
+            ]
+            if scans:
+                full_scans.append(name)
+                self.stdout.write(self.style.WARNING(f'FULL SCAN  {name}: {"; ".join(scans)}'))
+            else:
+                self.stdout.write(f'ok         {name}')
+            if options['plans']:
+                self.stdout.write(f'{plan}\n')
+
+        if not full_scans:
+            self.stdout.write(self.style.SUCCESS('No full table scans'))
+        elif options['strict']:
+            raise CommandError(f'{len(full_scans)} queries scan a whole table')
@@ -0,0 +1,117 @@
+import random
+import statistics
+import threading
+import time
+from contextlib import nullcontext
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.test.utils import override_settings
+
+from student.models import Attendance, Course, Enrollment, Student, calculate_grade
+
+LOADTEST_COURSE = 'LOADTEST'
+
+# Untuned SQLite settings, for comparison
+BASELINE_PRAGMAS = {'busy_timeout': 5000, 'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent write throughput by marking attendance from several threads, '
+        'each on its own database connection'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--students', type=int, default=200,
+                            help='Synthetic students the writers mark attendance for')
+        parser.add_argument('--baseline', action='store_true',
+                            help='SQLite only: use rollback journaling and synchronous=FULL '
+                                 'to compare against the tuned settings')
+
+    def handle(self, *args, **options):
+        baseline = options['baseline'] and connection.vendor == 'sqlite'
+        with override_settings(SQLITE_PRAGMAS=BASELINE_PRAGMAS) if baseline else nullcontext():
+            # Reconnect so the pragmas in effect apply to this connection too
+            connection.close()
+            self.stdout.write(f'Database: {connection.vendor} {connection.settings_dict["NAME"]}')
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.stdout.write(f'SQLite journal mode: {cursor.fetchone()[0]}')
+
+            course, student_ids = self._seed(options['students'])
+            try:
+                latencies, errors = self._run(course, student_ids, options)
+            finally:
+                self._cleanup()
+                connection.close()
+
+        if latencies:
+            quantiles = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f'{len(latencies)} writes in {options["seconds"]:.0f}s from {options["threads"]} threads: '
+                f'{len(latencies) / options["seconds"]:.0f} writes/s, '
+                f'p50 {quantiles[49] * 1000:.1f} ms, p95 {quantiles[94] * 1000:.1f} ms, '
+                f'{errors} lock timeouts'
+            )
+        else:
+            self.stdout.write(f'No writes completed, {errors} lock timeouts')
+
+    def _seed(self, count):
+        self._cleanup()
+        course = Course.objects.create(code=LOADTEST_COURSE, name='Load test', is_active=False)
+        start = (Student.objects.order_by('-roll_number').values_list('roll_number', flat=True).first() or 0) + 1
+        students = Student.objects.bulk_create([
+            Student(
+                name=f'Load Test {i}', roll_number=i, email=f'loadtest{i}@example.com',
+                marks=50, grade=calculate_grade(50), is_active=False,
+            )
+            for i in range(start, start + count)
+        ])
+        Enrollment.objects.bulk_create([Enrollment(student=student, course=course) for student in students])
+        return course, [student.pk for student in students]
+
+    def _cleanup(self):
+        Student.objects.filter(enrollments__course__code=LOADTEST_COURSE).delete()
+        Course.objects.filter(code=LOADTEST_COURSE).delete()
+
+    def _run(self, course, student_ids, options):
+        deadline = time.perf_counter() + options['seconds']
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+
+        def writer(seed):
+            rng = random.Random(seed)
+            close_old_connections()
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        # One teacher marking one student, as the per-row form does
+                        with transaction.atomic():
+                            Attendance.objects.update_or_create(
+                                student_id=rng.choice(student_ids), course=course,
+                                date=date.today() - timedelta(days=rng.randrange(30)),
+                                defaults={'status': rng.choice('PALE')},
+                            )
+                    except OperationalError:
+                        # Gave up waiting for the lock (busy_timeout)
+                        with lock:
+                            errors[0] += 1
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors[0]
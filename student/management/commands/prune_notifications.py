@@ -0,0 +1,23 @@
+import gzip
+
+from django.core.management.base import BaseCommand
+
+from student.notifications import prune_notifications
+
+
+class Command(BaseCommand):
+    help = 'Delete read notifications older than the retention period, in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help='Keep read notifications newer than this (default NOTIFICATION_RETENTION_DAYS)')
+        parser.add_argument('--archive', metavar='PATH',
+                            help='Append the deleted rows to this gzipped JSON Lines file first')
+
+    def handle(self, *args, **options):
+        if options['archive']:
+            with gzip.open(options['archive'], 'at', encoding='utf-8') as archive:
+                deleted = prune_notifications(options['days'], archive=archive)
+        else:
+            deleted = prune_notifications(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} read notifications'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student.attendance import rebuild_attendance_summary, verify_attendance_summary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the AttendanceSummary table from the live and archived Attendance rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only report mismatching summary rows; exit non-zero if any are found')
+        parser.add_argument('--student', type=int, action='append', dest='students',
+                            help='Limit to this student id (may be repeated)')
+
+    def handle(self, *args, **options):
+        student_ids = options['students']
+
+        if options['verify']:
+            mismatches = verify_attendance_summary(student_ids)
+            for student_id, course_id, stored, expected in mismatches:
+                scope = f'course {course_id}' if course_id else 'overall'
+                self.stdout.write(f'student {student_id} ({scope}): stored {stored}, expected {expected}')
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} summary rows are out of date')
+            self.stdout.write(self.style.SUCCESS('Attendance summary is up to date'))
+            return
+
+        count = rebuild_attendance_summary(student_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} attendance summary rows'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from student.models import Student
+from student.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the student search index from the Student table'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {type(backend).__name__} index for {Student.objects.count()} students'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from student.grading import regrade_students
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored student grades from GRADE_BOUNDARIES, in primary-key chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='Students per UPDATE (default GRADE_REGRADE_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        changed = regrade_students(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated the grade of {changed} students'))
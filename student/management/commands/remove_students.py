@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student.models import Student
+from student.removal import remove_students
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete or archive students in chunks, e.g. a graduating class. '
+        'Deleting also removes their enrollments, attendance and submissions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class-name', help='Students of this class')
+        parser.add_argument('--section', help='Only this section of --class-name')
+        parser.add_argument('--inactive', action='store_true',
+                            help='Students already archived (is_active=False)')
+        parser.add_argument('--archive', action='store_true',
+                            help='Mark the students inactive instead of deleting them')
+
+    def handle(self, *args, **options):
+        if not (options['class_name'] or options['inactive']):
+            raise CommandError('Choose the students with --class-name and/or --inactive.')
+
+        students = Student.objects.all()
+        if options['class_name']:
+            students = students.filter(class_name=options['class_name'])
+            if options['section']:
+                students = students.filter(section=options['section'])
+        if options['inactive']:
+            students = students.filter(is_active=False)
+        student_ids = list(students.values_list('pk', flat=True))
+
+        action = 'Archived' if options['archive'] else 'Deleted'
+        self.stdout.write(f'Removing {len(student_ids)} students')
+        removed = remove_students(
+            student_ids, archive=options['archive'],
+            on_progress=lambda fraction: self.stdout.write(f'  {fraction:.0%}'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'{action} {removed} students'))
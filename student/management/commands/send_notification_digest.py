@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from student.notifications import send_notification_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Email each user with email notifications turned on one digest of their '
+        'unread notifications; run it periodically, e.g. hourly from cron'
+    )
+
+    def handle(self, *args, **options):
+        sent = send_notification_digests()
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} digest emails'))
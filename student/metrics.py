@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q, Sum
+
+from .models import Student, Course, AttendanceSummary, grade_boundaries
+
+DASHBOARD_CACHE_KEY = 'student:dashboard_metrics'
+# Cache version of derived results (student.analytics); bumped on every change
+METRICS_VERSION_KEY = 'student:metrics_version'
+
+
+def compute_dashboard_metrics():
+    """Compute every dashboard aggregate in as few queries as possible"""
+    students = Student.objects.filter(is_active=True)
+
+    # Count, average and per-grade counts in one query
+    grade_counts = {
+        grade: Count('pk', filter=Q(grade=grade)) for grade, _ in grade_boundaries()
+    }
+    summary = students.aggregate(total=Count('pk'), average=Avg('marks'), **grade_counts)
+    grade_distribution = [
+        {'grade': grade, 'count': summary[grade]}
+        for grade, _ in grade_boundaries()
+        if summary[grade]
+    ]
+
+    attendance = AttendanceSummary.objects.filter(course__isnull=True).aggregate(
+        total=Sum('total'), present=Sum('present')
+    )
+    attendance_percentage = (
+        attendance['present'] / attendance['total'] * 100 if attendance['total'] else 0
+    )
+
+    return {
+        'total_students': summary['total'],
+        'average_marks': round(summary['average'] or 0, 2),
+        'grade_distribution': grade_distribution,
+        'top_performers': list(students.order_by('-marks')[:5]),
+        'recent_students': list(students.order_by('-created_at')[:5]),
+        'total_courses': Course.objects.filter(is_active=True).count(),
+        'attendance_percentage': round(attendance_percentage, 2),
+    }
+
+
+def dashboard_metrics():
+    """
+    Return the dashboard aggregates, served from the cache when possible.
+
+    The cache entry is dropped whenever a Student, Course or Attendance row
+    changes (see student.signals); DASHBOARD_CACHE_TTL only bounds how stale
+    the data can get if a change bypasses the signals, e.g. queryset.update().
+    """
+    return cache.get_or_set(
+        DASHBOARD_CACHE_KEY,
+        compute_dashboard_metrics,
+        getattr(settings, 'DASHBOARD_CACHE_TTL', 300),
+    )
+
+
+def metrics_version():
+    """Current cache version for results derived from student data"""
+    version = cache.get(METRICS_VERSION_KEY)
+    if version is None:
+        cache.add(METRICS_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(METRICS_VERSION_KEY)
+    return version
+
+
+def invalidate_dashboard_metrics():
+    cache.delete(DASHBOARD_CACHE_KEY)
+    # A fresh timestamp, so entries stored under any earlier version are never read again
+    cache.set(METRICS_VERSION_KEY, time.time_ns(), None)
@@ -0,0 +1,77 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """Database execute wrapper counting the queries it sees"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the SQL queries issued while handling each request and complain
+    when a view goes over its budget.
+
+    Configured by the QUERY_BUDGET setting::
+
+        QUERY_BUDGET = {
+            'DEFAULT': 20,                    # budget for views not listed
+            'VIEWS': {'course_list': 5},      # per URL name (None = unlimited)
+            'RAISE': False,                   # raise instead of logging
+        }
+
+    Only active when QUERY_BUDGET_ENABLED is true (defaults to DEBUG).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+
+        self.check_budget(request, counter.count)
+        return response
+
+    @property
+    def config(self):
+        return getattr(settings, 'QUERY_BUDGET', {})
+
+    def budget_for(self, view_name):
+        views = self.config.get('VIEWS', {})
+        if view_name in views:
+            return views[view_name]
+        return self.config.get('DEFAULT')
+
+    def check_budget(self, request, count):
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        budget = self.budget_for(view_name)
+        if budget is None or count <= budget:
+            return
+
+        message = f'{request.method} {request.path} ({view_name}) ran {count} queries, budget is {budget}'
+        if self.config.get('RAISE'):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
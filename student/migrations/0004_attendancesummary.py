@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+STATUS_FIELDS = {"P": "present", "A": "absent", "L": "late", "E": "excused"}
+
+
+def build_summaries(apps, schema_editor):
+    Attendance = apps.get_model("student", "Attendance")
+    AttendanceSummary = apps.get_model("student", "AttendanceSummary")
+
+    counts = {"total": Count("pk")}
+    for status, field in STATUS_FIELDS.items():
+        counts[field] = Count("pk", filter=Q(status=status))
+
+    attendances = Attendance.objects.order_by()
+    rows = [
+        AttendanceSummary(student_id=row.pop("student_id"), course_id=None, **row)
+        for row in attendances.values("student_id").annotate(**counts)
+    ]
+    rows += [
+        AttendanceSummary(
+            student_id=row.pop("student_id"), course_id=row.pop("course_id"), **row
+        )
+        for row in attendances.filter(course__isnull=False)
+        .values("student_id", "course_id")
+        .annotate(**counts)
+    ]
+    AttendanceSummary.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("student", "0003_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("present", models.PositiveIntegerField(default=0)),
+                ("absent", models.PositiveIntegerField(default=0)),
+                ("late", models.PositiveIntegerField(default=0)),
+                ("excused", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attendance_summaries",
+                        to="student.course",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attendance_summaries",
+                        to="student.student",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Attendance summaries",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("student", "course"),
+                        name="unique_course_attendance_summary",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("course__isnull", True)),
+                        fields=("student",),
+                        name="unique_overall_attendance_summary",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS student_search USING fts5(
+        name, email, roll_number, tokenize = "unicode61 remove_diacritics 2", prefix = '2 3'
+    )
+    """,
+    """
+    INSERT INTO student_search (rowid, name, email, roll_number)
+    SELECT id, name, email, CAST(roll_number AS TEXT) FROM student_student
+    """,
+]
+SQLITE_REVERSE = ["DROP TABLE IF EXISTS student_search"]
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS student_name_trgm ON student_student USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS student_email_trgm ON student_student USING gin (email gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS student_email_prefix ON student_student (email varchar_pattern_ops)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS student_email_prefix",
+    "DROP INDEX IF EXISTS student_email_trgm",
+    "DROP INDEX IF EXISTS student_name_trgm",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("student", "0004_attendancesummary"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            run_for_vendor({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("student", "0006_query_pattern_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Existing notifications predate the digest: add them as already
+        # emailed, then switch the default for new rows
+        migrations.AddField(
+            model_name="notification",
+            name="emailed",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="emailed",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("emailed", False)),
+                fields=["user"],
+                name="notification_digest_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("student", "0007_notification_emailed"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("academic_year", models.PositiveSmallIntegerField(unique=True)),
+                ("rows_archived", models.PositiveIntegerField(default=0)),
+                ("started_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["-academic_year"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedAttendance",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "academic_year",
+                    models.PositiveSmallIntegerField(
+                        help_text="Year the academic year starts in"
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("P", "Present"),
+                            ("A", "Absent"),
+                            ("L", "Late"),
+                            ("E", "Excused"),
+                        ],
+                        max_length=1,
+                    ),
+                ),
+                ("remarks", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField()),
+                (
+                    "course",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_attendances",
+                        to="student.course",
+                    ),
+                ),
+                (
+                    "marked_by",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_attendances",
+                        to="student.student",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+                "indexes": [
+                    models.Index(
+                        fields=["academic_year", "-date"],
+                        name="archived_att_year_date_idx",
+                    ),
+                    models.Index(
+                        fields=["student", "date"], name="archived_att_student_date_idx"
+                    ),
+                    models.Index(
+                        fields=["course", "date"], name="archived_att_course_date_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
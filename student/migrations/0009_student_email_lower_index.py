@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Email prefix search compares lower-cased emails. PostgreSQL serves it with
+# LIKE 'prefix%', which needs text_pattern_ops outside the C collation.
+SQLITE_FORWARD = [
+    "CREATE INDEX IF NOT EXISTS student_email_lower ON student_student (lower(email))",
+]
+SQLITE_REVERSE = ["DROP INDEX IF EXISTS student_email_lower"]
+
+POSTGRES_FORWARD = [
+    "CREATE INDEX IF NOT EXISTS student_email_lower ON student_student (lower(email) text_pattern_ops)",
+    "DROP INDEX IF EXISTS student_email_prefix",
+]
+POSTGRES_REVERSE = [
+    "CREATE INDEX IF NOT EXISTS student_email_prefix ON student_student (email varchar_pattern_ops)",
+    "DROP INDEX IF EXISTS student_email_lower",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("student", "0008_attendance_archive"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            run_for_vendor({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:24
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("student", "0009_student_email_lower_index"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="archivedattendance",
+            unique_together={("student", "course", "date")},
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:42
+
+import student.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("student", "0010_archived_attendance_unique"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="student",
+            name="grade",
+            field=models.CharField(
+                blank=True, choices=student.models.grade_choices, max_length=1
+            ),
+        ),
+    ]
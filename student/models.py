@@ -1,18 +1,91 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.contrib.auth.models import User
-from django.db.models import Avg
+from django.db.models import Avg, Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Concat, Trim
+from django.db.models.lookups import GreaterThanOrEqual
+
+DEFAULT_GRADE_BOUNDARIES = {'A': 90, 'B': 80, 'C': 70, 'D': 60, 'F': 0}
+
+
+def grade_boundaries():
+    """(grade, minimum marks) pairs from the GRADE_BOUNDARIES setting, highest first"""
+    boundaries = getattr(settings, 'GRADE_BOUNDARIES', DEFAULT_GRADE_BOUNDARIES)
+    return sorted(boundaries.items(), key=lambda boundary: boundary[1], reverse=True)
+
+
+def calculate_grade(marks):
+    """Return the letter grade for the given marks"""
+    boundaries = grade_boundaries()
+    for grade, minimum in boundaries:
+        if marks >= minimum:
+            return grade
+    return boundaries[-1][0]
+
+
+def grade_choices():
+    """Grade choices labelled with the marks each grade covers under the current boundaries"""
+    boundaries = grade_boundaries()
+    choices = []
+    upper = 100
+    for index, (grade, minimum) in enumerate(boundaries):
+        # The lowest grade also takes anything below its minimum
+        lower = 0 if index == len(boundaries) - 1 else minimum
+        choices.append((grade, f'{grade} Grade ({lower}-{upper})'))
+        upper = minimum - 1
+    return choices
+
+
+def grade_expression(marks='marks'):
+    """SQL CASE equivalent of calculate_grade() for a field name or expression"""
+    if isinstance(marks, str):
+        marks = F(marks)
+    *higher, (lowest, _) = grade_boundaries()
+    return Case(
+        *[When(GreaterThanOrEqual(marks, minimum), then=Value(grade)) for grade, minimum in higher],
+        default=Value(lowest),
+        output_field=models.CharField(),
+    )
+
+
+class StudentQuerySet(models.QuerySet):
+    """Keeps ``grade`` in step with ``marks`` on bulk writes, which bypass save()"""
+
+    def update(self, **kwargs):
+        if 'marks' in kwargs and 'grade' not in kwargs:
+            marks = kwargs['marks']
+            if hasattr(marks, 'resolve_expression'):
+                # Computed from the new value in the same statement
+                kwargs['grade'] = grade_expression(marks)
+            else:
+                kwargs['grade'] = calculate_grade(marks)
+        return super().update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.grade = calculate_grade(obj.marks)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = list(fields)
+        if 'marks' in fields and 'grade' not in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.grade = calculate_grade(obj.marks)
+            fields.append('grade')
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def regrade(self):
+        """Recompute stale grades in a single UPDATE ... CASE; returns the rows changed"""
+        grade = grade_expression()
+        return self.exclude(grade=grade).update(grade=grade)
+
 
 class Student(models.Model):
-    GRADE_CHOICES = [
-        ('A', 'A Grade (90-100)'),
-        ('B', 'B Grade (80-89)'),
-        ('C', 'C Grade (70-79)'),
-        ('D', 'D Grade (60-69)'),
-        ('F', 'F Grade (0-59)'),
-    ]
-    
     GENDER_CHOICES = [
         ('M', 'Male'),
         ('F', 'Female'),
@@ -49,7 +122,7 @@ class Student(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(100)],
         help_text="Enter marks between 0 and 100"
     )
-    grade = models.CharField(max_length=1, choices=GRADE_CHOICES, blank=True)
+    grade = models.CharField(max_length=1, choices=grade_choices, blank=True)
     admission_date = models.DateField(default=timezone.now)
     class_name = models.CharField(max_length=50, blank=True, null=True)
     section = models.CharField(max_length=10, blank=True, null=True)
@@ -60,21 +133,14 @@ class Student(models.Model):
     is_active = models.BooleanField(default=True)
     notes = models.TextField(blank=True, null=True, help_text="Internal notes about the student")
 
+    objects = StudentQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.roll_number})"
     
     def save(self, *args, **kwargs):
         # Auto-calculate grade based on marks
-        if self.marks >= 90:
-            self.grade = 'A'
-        elif self.marks >= 80:
-            self.grade = 'B'
-        elif self.marks >= 70:
-            self.grade = 'C'
-        elif self.marks >= 60:
-            self.grade = 'D'
-        else:
-            self.grade = 'F'
+        self.grade = calculate_grade(self.marks)
         super().save(*args, **kwargs)
     
     def get_grade_display_full(self):
@@ -88,12 +154,9 @@ class Student(models.Model):
         return grade_map.get(self.grade, 'N/A')
     
     def get_attendance_percentage(self):
-        """Calculate attendance percentage"""
-        total = Attendance.objects.filter(student=self).count()
-        if total == 0:
-            return 0
-        present = Attendance.objects.filter(student=self, status='P').count()
-        return round((present / total) * 100, 2)
+        """Calculate attendance percentage from the attendance summary"""
+        summary = AttendanceSummary.objects.filter(student=self, course__isnull=True).first()
+        return summary.percentage if summary else 0
     
     def get_enrolled_courses(self):
         """Get all courses the student is enrolled in"""
@@ -106,9 +169,29 @@ class Student(models.Model):
             models.Index(fields=['email']),
             models.Index(fields=['grade']),
             models.Index(fields=['class_name']),
+            # Listings only ever show active students, sorted one of these ways
+            models.Index(fields=['-created_at'], condition=models.Q(is_active=True), name='student_active_created_idx'),
+            models.Index(fields=['marks'], condition=models.Q(is_active=True), name='student_active_marks_idx'),
+            models.Index(fields=['name'], condition=models.Q(is_active=True), name='student_active_name_idx'),
         ]
 
 
+def _count_subquery(queryset, field):
+    """Correlated COUNT of ``queryset`` rows whose ``field`` is the outer row"""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('pk'))
+    return Coalesce(Subquery(counts.values('count'), output_field=IntegerField()), 0)
+
+
+class CourseQuerySet(models.QuerySet):
+    def with_stats(self):
+        """Annotate active enrollment and assignment counts and the teacher's full name"""
+        return self.annotate(
+            active_enrollments_count=_count_subquery(Enrollment.objects.filter(is_active=True), 'course'),
+            active_assignments_count=_count_subquery(Assignment.objects.filter(is_active=True), 'course'),
+            teacher_name=Trim(Concat('teacher__first_name', Value(' '), 'teacher__last_name')),
+        )
+
+
 class Course(models.Model):
     """Course/Subject Model"""
     code = models.CharField(max_length=20, unique=True)
@@ -122,12 +205,27 @@ class Course(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CourseQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.code} - {self.name}"
     
     def get_enrolled_students_count(self):
+        # Use the with_stats() annotation when present
+        if hasattr(self, 'active_enrollments_count'):
+            return self.active_enrollments_count
         return self.enrollments.filter(is_active=True).count()
     
+    def get_assignments_count(self):
+        if hasattr(self, 'active_assignments_count'):
+            return self.active_assignments_count
+        return self.assignments.filter(is_active=True).count()
+    
+    def get_teacher_name(self):
+        if hasattr(self, 'teacher_name'):
+            return self.teacher_name
+        return self.teacher.get_full_name() if self.teacher_id else ''
+    
     class Meta:
         ordering = ['code']
 
@@ -169,11 +267,110 @@ class Attendance(models.Model):
     class Meta:
         unique_together = ['student', 'course', 'date']
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['student', 'status'], name='attendance_student_status_idx'),
+            models.Index(fields=['-date'], name='attendance_date_idx'),
+            models.Index(fields=['course', '-date'], name='attendance_course_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.student.name} - {self.date} - {self.get_status_display()}"
+    
+    def clean(self):
+        from .archival import validate_open_year
+        
+        try:
+            validate_open_year(self.date)
+        except ValidationError as e:
+            raise ValidationError({'date': e.messages})
+
+
+class ArchivedAttendance(models.Model):
+    """Attendance of a closed academic year, moved out of the live table (see student.archival)"""
+    # Keeps the id the row had in Attendance
+    id = models.BigIntegerField(primary_key=True)
+    academic_year = models.PositiveSmallIntegerField(help_text="Year the academic year starts in")
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='archived_attendances')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='archived_attendances', null=True, blank=True)
+    date = models.DateField()
+    status = models.CharField(max_length=1, choices=Attendance.STATUS_CHOICES)
+    remarks = models.TextField(blank=True, null=True)
+    marked_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['student', 'course', 'date']
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['academic_year', '-date'], name='archived_att_year_date_idx'),
+            models.Index(fields=['student', 'date'], name='archived_att_student_date_idx'),
+            models.Index(fields=['course', 'date'], name='archived_att_course_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.name} - {self.date} - {self.get_status_display()}"
 
 
+class AttendanceArchive(models.Model):
+    """Progress of moving one academic year of attendance into ArchivedAttendance"""
+    academic_year = models.PositiveSmallIntegerField(unique=True)
+    rows_archived = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-academic_year']
+    
+    def __str__(self):
+        return f"Attendance {self.academic_year}"
+
+
+class AttendanceSummary(models.Model):
+    """
+    Denormalized attendance counts, kept up to date as Attendance rows change.
+    
+    Each student has one overall row (course is NULL) plus one row per course
+    they have attendance in. Counts cover all years, archived ones included.
+    """
+    # Attendance status -> summary count field
+    STATUS_FIELDS = {
+        'P': 'present',
+        'A': 'absent',
+        'L': 'late',
+        'E': 'excused',
+    }
+    
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_summaries')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='attendance_summaries', null=True, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    excused = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Attendance summaries'
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'course'], name='unique_course_attendance_summary'),
+            models.UniqueConstraint(
+                fields=['student'],
+                condition=models.Q(course__isnull=True),
+                name='unique_overall_attendance_summary',
+            ),
+        ]
+    
+    def __str__(self):
+        scope = self.course.code if self.course_id else 'Overall'
+        return f"{self.student.name} - {scope} - {self.percentage}%"
+    
+    @property
+    def percentage(self):
+        if self.total == 0:
+            return 0
+        return round((self.present / self.total) * 100, 2)
+
+
 class Assignment(models.Model):
     """Assignments for courses"""
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='assignments')
@@ -239,9 +436,16 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     link = models.CharField(max_length=500, blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now)
+    # Set once the notification has been through the email digest
+    emailed = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notification_user_read_idx'),
+            models.Index(fields=['user'], condition=models.Q(emailed=False), name='notification_digest_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
@@ -260,6 +464,13 @@ class Announcement(models.Model):
     
     class Meta:
         ordering = ['-priority', '-created_at']
+        indexes = [
+            models.Index(
+                fields=['-priority', '-created_at'],
+                condition=models.Q(is_active=True),
+                name='announce_active_priority_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -268,3 +479,35 @@ class Announcement(models.Model):
         if self.expires_at:
             return timezone.now() > self.expires_at
         return False
+
+
+class Job(models.Model):
+    """Background job for long-running imports, exports and reports"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('SUCCESS', 'Success'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    progress = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])
+    params = models.JSONField(default=dict, blank=True)
+    input_file = models.FileField(upload_to='jobs/input/', blank=True, null=True)
+    result_file = models.FileField(upload_to='jobs/results/', blank=True, null=True)
+    message = models.TextField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.kind} #{self.pk} - {self.get_status_display()}"
+    
+    def is_finished(self):
+        return self.status in ('SUCCESS', 'FAILED')
@@ -0,0 +1,259 @@
+import json
+from datetime import timedelta
+from itertools import groupby
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Enrollment, Notification, Student, Submission
+
+UNREAD_CACHE_KEY = 'student:unread_notifications:{user_id}'
+
+
+def notification_group(user_id):
+    """Channel layer group of a user's open notification sockets"""
+    return f'notifications_{user_id}'
+
+
+def unread_count(user_id):
+    """Return the user's unread notification count, cached until it changes"""
+    return cache.get_or_set(
+        UNREAD_CACHE_KEY.format(user_id=user_id),
+        lambda: Notification.objects.filter(user_id=user_id, is_read=False).count(),
+        getattr(settings, 'NOTIFICATION_COUNT_CACHE_TTL', None),
+    )
+
+
+def invalidate_unread_count(*user_ids):
+    cache.delete_many([UNREAD_CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+def mark_read(user, ids=None, up_to=None):
+    """
+    Mark unread notifications of ``user`` as read in one UPDATE: those in
+    ``ids``, those created at or before ``up_to``, or (with neither) all of
+    them. Returns how many changed.
+    """
+    notifications = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(pk__in=ids)
+    if up_to is not None:
+        notifications = notifications.filter(created_at__lte=up_to)
+    updated = notifications.update(is_read=True)
+    if updated:
+        # update() sends no signals
+        invalidate_unread_count(user.pk)
+        push_unread_count(user.pk)
+    return updated
+
+
+def notification_payload(notification):
+    return {
+        'id': notification.pk,
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'link': notification.link,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+def push_notification(notification):
+    """Send a new notification to the user's connected browsers"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(notification_group(notification.user_id), {
+        'type': 'notification.created',
+        'notification': notification_payload(notification),
+        'unread_count': unread_count(notification.user_id),
+    })
+
+
+def push_unread_count(user_id):
+    """Update the badge in the user's other open tabs after notifications are read"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(notification_group(user_id), {
+        'type': 'notification.read',
+        'unread_count': unread_count(user_id),
+    })
+
+
+# ==================== FAN-OUT ====================
+
+def batch_size():
+    return getattr(settings, 'NOTIFICATION_BATCH_SIZE', 1000)
+
+
+def assignment_recipients(assignment):
+    """User ids of the active students enrolled in the assignment's course"""
+    return (
+        Enrollment.objects
+        .filter(course_id=assignment.course_id, is_active=True,
+                student__is_active=True, student__user__isnull=False)
+        .values_list('student__user_id', flat=True)
+        .distinct()
+    )
+
+
+def announcement_recipients(announcement):
+    """User ids of the active students in the announcement's target class (all when blank)"""
+    students = Student.objects.filter(is_active=True, user__isnull=False)
+    if announcement.target_class:
+        students = students.filter(class_name=announcement.target_class)
+    return students.values_list('user_id', flat=True)
+
+
+def fan_out(user_ids, title, message, notification_type='INFO', link=None, on_progress=None):
+    """
+    Send the same notification to every user in ``user_ids`` (a queryset is
+    evaluated once). Returns the number of notifications created.
+    """
+    return create_notifications([
+        Notification(user_id=user_id, title=title, message=message,
+                     notification_type=notification_type, link=link)
+        for user_id in user_ids
+    ], on_progress=on_progress)
+
+
+def grade_notifications(submission_ids, on_progress=None):
+    """Tell each student their mark; one notification per graded submission"""
+    submissions = (
+        Submission.objects
+        .filter(pk__in=submission_ids, marks_obtained__isnull=False, student__user__isnull=False)
+        .values_list('student__user_id', 'assignment_id', 'assignment__title',
+                     'marks_obtained', 'assignment__total_marks')
+    )
+    return create_notifications([
+        Notification(
+            user_id=user_id, notification_type='GRADE',
+            title=f'Graded: {title}',
+            message=f'You scored {marks:g} out of {total} in {title}.',
+            link=reverse('assignment_detail', args=[assignment_id]),
+        )
+        for user_id, assignment_id, title, marks, total in submissions
+    ], on_progress=on_progress)
+
+
+def create_notifications(notifications, on_progress=None):
+    """
+    Insert unsaved notifications with batched ``bulk_create`` and push them
+    to open sockets. Returns how many were created.
+    """
+    size = batch_size()
+    for start in range(0, len(notifications), size):
+        created = Notification.objects.bulk_create(notifications[start:start + size])
+        # bulk_create sends no signals: refresh the cached counts in one query
+        _cache_unread_counts({notification.user_id for notification in created})
+        for notification in created:
+            push_notification(notification)
+        if on_progress:
+            on_progress(min(start + size, len(notifications)) / len(notifications))
+    return len(notifications)
+
+
+def _cache_unread_counts(user_ids):
+    counts = dict.fromkeys(user_ids, 0)
+    counts.update(
+        Notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .values_list('user_id').annotate(count=Count('pk')).order_by()
+    )
+    cache.set_many(
+        {UNREAD_CACHE_KEY.format(user_id=user_id): count for user_id, count in counts.items()},
+        getattr(settings, 'NOTIFICATION_COUNT_CACHE_TTL', None),
+    )
+
+
+# ==================== EMAIL DIGEST ====================
+
+def send_notification_digests():
+    """
+    Email every user who has ``email_notifications`` turned on one message
+    listing their unread notifications not yet emailed. Every pending
+    notification is marked as emailed, sent or not, so opted-out users do
+    not build up a backlog. Returns the number of emails sent.
+    """
+    pending = (
+        Notification.objects.filter(emailed=False)
+        .order_by('user_id', 'created_at')
+        .values_list('pk', 'user_id', 'user__email', 'user__first_name',
+                     'user__profile__email_notifications', 'is_read', 'title', 'message', 'link')
+        .iterator(chunk_size=batch_size())
+    )
+    connection = get_connection()
+    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None)
+    messages, pks, sent = [], [], 0
+
+    for user_id, rows in groupby(pending, key=lambda row: row[1]):
+        rows = list(rows)
+        pks.extend(row[0] for row in rows)
+        _, _, email, first_name, opted_in, *_ = rows[0]
+        unread = [
+            {'title': title, 'message': message, 'link': link}
+            for _, _, _, _, _, is_read, title, message, link in rows if not is_read
+        ]
+        if opted_in and email and unread:
+            messages.append(EmailMessage(
+                subject=f'You have {len(unread)} new notification{"s" if len(unread) != 1 else ""}',
+                body=render_to_string('student/emails/notification_digest.txt', {
+                    'first_name': first_name, 'notifications': unread,
+                }),
+                from_email=from_email, to=[email], connection=connection,
+            ))
+        if len(pks) >= batch_size():
+            sent += _flush_digests(connection, messages, pks)
+            messages, pks = [], []
+
+    return sent + _flush_digests(connection, messages, pks)
+
+
+def _flush_digests(connection, messages, pks):
+    sent = (connection.send_messages(messages) or 0) if messages else 0
+    if pks:
+        Notification.objects.filter(pk__in=pks).update(emailed=True)
+    return sent
+
+
+# ==================== RETENTION ====================
+
+ARCHIVE_FIELDS = ['id', 'user_id', 'title', 'message', 'notification_type', 'link', 'created_at']
+
+
+def prune_notifications(days=None, archive=None, on_progress=None):
+    """
+    Delete read notifications older than ``days`` (NOTIFICATION_RETENTION_DAYS
+    by default) in NOTIFICATION_BATCH_SIZE chunks, each in its own short
+    transaction. With ``archive``, a text file object, every chunk is first
+    written to it as JSON Lines. Returns the number deleted.
+    """
+    if days is None:
+        days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90)
+    expired = Notification.objects.filter(is_read=True, created_at__lt=timezone.now() - timedelta(days=days))
+    total = expired.count()
+    size = batch_size()
+    deleted = last_pk = 0
+
+    while True:
+        # Walk the primary key so every chunk starts where the previous one ended
+        pks = list(expired.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:size])
+        if not pks:
+            break
+        last_pk = pks[-1]
+        chunk = Notification.objects.filter(pk__in=pks)
+        if archive is not None:
+            for row in chunk.order_by('pk').values(*ARCHIVE_FIELDS):
+                archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+        deleted += chunk.delete()[0]
+        if on_progress and total:
+            on_progress(deleted / total)
+    return deleted
@@ -0,0 +1,261 @@
+import base64
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def approximate_count(queryset):
+    """
+    Count ``queryset``, caching the result per SQL statement for
+    PAGINATION_COUNT_CACHE_TTL seconds.
+
+    Page navigation only needs a rough total, so this trades freshness for
+    not running a COUNT(*) on every page.
+    """
+    sql, params = queryset.query.sql_with_params()
+    key = 'pagination-count:' + hashlib.md5(repr((sql, params)).encode('utf-8')).hexdigest()
+    return cache.get_or_set(key, queryset.count, getattr(settings, 'PAGINATION_COUNT_CACHE_TTL', 60))
+
+
+class CachedCountPaginator(Paginator):
+    """Django paginator whose total comes from ``approximate_count``"""
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder that keeps full microsecond precision on datetimes"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    """One page of a ``KeysetPaginator``; quacks like a Django ``Page`` where it can"""
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.last_cursor = paginator.last_cursor
+        # Query string of the other request parameters, for building page links
+        self.query_string = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking past the sort key of the last row seen
+    instead of using OFFSET.
+
+    The ordering defaults to the queryset's own ordering and always ends with
+    the primary key so the key is unique. Ordering fields must be plain
+    (non-null) model fields or annotations of the queryset. Cursors are opaque
+    tokens holding the key of the row to continue from.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = self._resolve_ordering(ordering or queryset.query.order_by or queryset.model._meta.ordering)
+
+    def _resolve_ordering(self, ordering):
+        opts = self.queryset.model._meta
+        resolved = []
+        for item in ordering:
+            if not isinstance(item, str) or item == '?':
+                raise ValueError(f'Keyset pagination cannot order by {item!r}')
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            if name == 'pk':
+                name = opts.pk.attname
+            if name in self.queryset.query.annotations:
+                field = self.queryset.query.annotations[name].output_field
+            else:
+                try:
+                    field = opts.get_field(name)
+                except FieldDoesNotExist:
+                    raise ValueError(f'Keyset pagination cannot order by {item!r}')
+                name = field.attname
+            resolved.append((name, descending, field))
+            if field == opts.pk:
+                break
+        else:
+            # Break ties on the primary key, in the direction of the last field
+            descending = resolved[-1][1] if resolved else False
+            resolved.append((opts.pk.attname, descending, opts.pk))
+        return resolved
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.queryset)
+
+    @property
+    def last_cursor(self):
+        return self._encode(None, backwards=True)
+
+    def _encode(self, row, backwards=False):
+        values = None if row is None else [getattr(row, name) for name, _, _ in self.ordering]
+        payload = json.dumps({'v': values, 'b': backwards}, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def _decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            values, backwards = payload['v'], bool(payload['b'])
+            if values is not None:
+                if len(values) != len(self.ordering):
+                    raise ValueError('cursor does not match the ordering')
+                values = [field.to_python(value) for value, (_, _, field) in zip(values, self.ordering)]
+        except Exception as e:
+            raise InvalidCursor('Invalid cursor') from e
+        return values, backwards
+
+    def _seek(self, values, backwards):
+        """Q matching the rows that sort after ``values`` (before, when ``backwards``)"""
+        condition = Q()
+        equal = Q()
+        for (name, descending, _), value in zip(self.ordering, values):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def page(self, cursor=None):
+        """Return the page starting at ``cursor`` (the first page when empty)"""
+        values, backwards = self._decode(cursor) if cursor else (None, False)
+
+        ordering = [
+            f'-{name}' if descending != backwards else name
+            for name, descending, _ in self.ordering
+        ]
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next = values is not None
+            has_previous = has_more
+        else:
+            has_next = has_more
+            has_previous = values is not None
+
+        return KeysetPage(
+            rows, self,
+            next_cursor=self._encode(rows[-1]) if has_next and rows else None,
+            previous_cursor=self._encode(rows[0], backwards=True) if has_previous and rows else None,
+        )
+
+    def get_page(self, cursor=None):
+        """Like ``page`` but falls back to the first page on a bad cursor"""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+def paginate_keyset(request, queryset, per_page, cursor_param='cursor'):
+    """Return the keyset page of ``queryset`` selected by the request's cursor"""
+    page = KeysetPaginator(queryset, per_page).get_page(request.GET.get(cursor_param))
+    params = request.GET.copy()
+    params.pop(cursor_param, None)
+    params.pop('page', None)
+    page.query_string = params.urlencode()
+    return page
+
+
+class KeysetOptInPagination(PageNumberPagination):
+    """
+    Page-number pagination with a cached total, switching to keyset pages
+    when the request carries a ``cursor`` parameter (``?cursor=`` for the
+    first page).
+    """
+    django_paginator_class = CachedCountPaginator
+    cursor_query_param = 'cursor'
+    keyset_page = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.keyset_page = None
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            self.keyset_page = paginator.page(request.query_params[self.cursor_query_param])
+        except InvalidCursor:
+            raise NotFound('Invalid cursor.')
+        return list(self.keyset_page)
+
+    def get_paginated_response(self, data):
+        if self.keyset_page is None:
+            return super().get_paginated_response(data)
+        return Response({
+            'count': self.keyset_page.paginator.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def _cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if self.keyset_page is None:
+            return super().get_next_link()
+        return self._cursor_link(self.keyset_page.next_cursor)
+
+    def get_previous_link(self):
+        if self.keyset_page is None:
+            return super().get_previous_link()
+        return self._cursor_link(self.keyset_page.previous_cursor)
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .metrics import invalidate_dashboard_metrics
+from .models import Student
+from .search import get_search_backend
+
+
+def batch_size():
+    return getattr(settings, 'STUDENT_REMOVAL_BATCH_SIZE', 500)
+
+
+def _dependents(model):
+    """Reverse foreign keys pointing at ``model``"""
+    return [
+        relation for relation in model._meta.related_objects
+        if relation.one_to_many or relation.one_to_one
+    ]
+
+
+def _delete_cascade(rows):
+    """
+    Delete ``rows`` and everything that cascades from them with one DELETE
+    per table, dependents first. Rows are never loaded into memory, so no
+    delete signals are sent.
+    """
+    for relation in _dependents(rows.model):
+        dependents = relation.related_model._base_manager.filter(
+            **{f'{relation.field.name}__in': rows.values('pk')}
+        )
+        if relation.on_delete is models.CASCADE:
+            _delete_cascade(dependents)
+        elif relation.on_delete is models.SET_NULL:
+            dependents.update(**{relation.field.name: None})
+        elif relation.on_delete is not models.DO_NOTHING:
+            raise ValueError(
+                f'{relation.related_model.__name__}.{relation.field.name} uses '
+                f'{relation.on_delete.__name__}, which bulk removal does not support'
+            )
+    # QuerySet.delete() would collect every row to send signals
+    return rows._raw_delete(rows.db)
+
+
+def remove_students(student_ids, archive=False, on_progress=None):
+    """
+    Remove many students without stalling the site.
+
+    Works through ``student_ids`` in STUDENT_REMOVAL_BATCH_SIZE chunks, each
+    in its own short transaction. By default each chunk is deleted together
+    with its enrollments, attendance, attendance summaries and submissions
+    using set-based DELETEs. With ``archive`` the students are only marked
+    inactive, which hides them from every list and keeps their history.
+
+    Returns the number of students removed.
+    """
+    student_ids = sorted(set(student_ids))
+    size = batch_size()
+    removed = 0
+    for start in range(0, len(student_ids), size):
+        chunk = student_ids[start:start + size]
+        students = Student.objects.filter(pk__in=chunk)
+        with transaction.atomic():
+            if archive:
+                removed += students.filter(is_active=True).update(is_active=False, updated_at=timezone.now())
+            else:
+                removed += _delete_cascade(students)
+                get_search_backend().remove(chunk)
+        if on_progress:
+            on_progress(min(start + size, len(student_ids)) / len(student_ids))
+
+    if removed:
+        invalidate_dashboard_metrics()
+    return removed
@@ -0,0 +1,161 @@
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+
+# Models are imported inside functions so that pool workers can import this
+# module without a configured Django app registry.
+
+# Fields loaded for each report card
+REPORT_FIELDS = ['pk', 'name', 'roll_number', 'email', 'phone', 'class_name', 'section', 'marks', 'grade']
+
+
+@lru_cache(maxsize=None)
+def _report_styles():
+    """Build the paragraph and table styles once per process"""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#6366f1'),
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+    ])
+    return title_style, table_style
+
+
+def _report_elements(card):
+    title_style, table_style = _report_styles()
+    data = [
+        ['Name:', card['name']],
+        ['Roll Number:', str(card['roll_number'])],
+        ['Email:', card['email']],
+        ['Phone:', card['phone'] or 'N/A'],
+        ['Class:', card['class_name'] or 'N/A'],
+        ['Marks:', f"{card['marks']}%"],
+        ['Grade:', card['grade']],
+        ['Attendance:', f"{card['attendance_percentage']}%"],
+    ]
+    table = Table(data, colWidths=[2*inch, 4*inch])
+    table.setStyle(table_style)
+    return [Paragraph('Student Report', title_style), Spacer(1, 0.3*inch), table]
+
+
+def render_report_card(card):
+    """
+    Render one report card PDF from a dict of student data and return its bytes.
+
+    Only plain data is used here (no ORM access), so this can run in a worker
+    process.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    doc.build(_report_elements(card))
+    return buffer.getvalue()
+
+
+def report_card_filename(card):
+    return f"student_report_{card['roll_number']}.pdf"
+
+
+def report_card_data(students):
+    """Load everything the report cards need for ``students`` in one query"""
+    from .attendance import annotate_attendance
+
+    return list(
+        annotate_attendance(students).order_by('class_name', 'section', 'roll_number')
+        .values(*REPORT_FIELDS, 'attendance_percentage')
+    )
+
+
+def render_student_report(student):
+    """Render the PDF report card for a single student and return its bytes"""
+    from .models import Student
+
+    return render_report_card(report_card_data(Student.objects.filter(pk=student.pk))[0])
+
+
+def report_workers():
+    return getattr(settings, 'REPORT_WORKERS', None) or os.cpu_count() or 1
+
+
+def _report_pool_context():
+    # Jobs run on threads, and forking a threaded process can deadlock the child
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def _init_report_worker():
+    """Drop any database connections a worker starts with; rendering never queries"""
+    from django.db import connections
+
+    connections.close_all()
+
+
+def iter_rendered_reports(cards, workers=None):
+    """Yield ``(card, pdf_bytes)`` for every card, rendering across a process pool"""
+    workers = workers or report_workers()
+    if workers == 1 or len(cards) < 2:
+        for card in cards:
+            yield card, render_report_card(card)
+        return
+
+    chunksize = max(1, len(cards) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=_report_pool_context(), initializer=_init_report_worker,
+    ) as executor:
+        yield from zip(cards, executor.map(render_report_card, cards, chunksize=chunksize))
+
+
+def write_reports_zip(cards, output, workers=None, on_progress=None):
+    """Write one PDF per card into a ZIP archive"""
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for count, (card, pdf) in enumerate(iter_rendered_reports(cards, workers), start=1):
+            archive.writestr(report_card_filename(card), pdf)
+            if on_progress:
+                on_progress(count / len(cards))
+    return output
+
+
+def write_reports_pdf(cards, output):
+    """Write every card into a single PDF, one page per student"""
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    elements = []
+    for card in cards:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(_report_elements(card))
+    doc.build(elements)
+    return output
+
+
+def class_report_students(class_name=None, section=None):
+    """Active students of a class (and optionally section)"""
+    from .models import Student
+
+    students = Student.objects.filter(is_active=True)
+    if class_name:
+        students = students.filter(class_name=class_name)
+    if section:
+        students = students.filter(section=section)
+    return students
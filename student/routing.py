@@ -0,0 +1,151 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import FileResponse
+
+STICKY_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Always read from the primary: a session must be visible the moment it is created
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+class RoutingState:
+    """Where the current request may read from, and whether it has written"""
+
+    def __init__(self, read_alias=None):
+        self.read_alias = read_alias
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'REPLICA_DATABASES', []))
+
+
+@contextmanager
+def read_from(alias):
+    """Route reads inside the block to ``alias`` (None = the primary)"""
+    token = _state.set(RoutingState(alias))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def read_from_replica():
+    """Route reads inside the block to a randomly chosen replica, if any"""
+    replicas = replica_aliases()
+    return read_from(random.choice(replicas) if replicas else None)
+
+
+def use_primary(view):
+    """Mark a view (function or DRF view class) as always reading from the primary"""
+    view.use_primary_db = True
+    return view
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica chosen for the current request and every
+    write to the primary. Outside a routed request, or once the request has
+    written or opened a transaction, reads go to the primary as well.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.read_alias is None or state.wrote:
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.read_alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        # Session writes happen on every request and never need stickiness
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in replica_aliases()
+
+
+def _routed_stream(chunks, state):
+    """Re-apply the request's routing state while each chunk is produced"""
+    iterator = iter(chunks)
+    while True:
+        token = _state.set(state)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _state.reset(token)
+        yield chunk
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the reads of safe-method requests to a replica.
+
+    A request that writes (or any POST, PUT, PATCH or DELETE) sets a
+    cookie making the same client read from the primary for the next
+    REPLICA_STICKY_SECONDS, so redirects after a form post see the change.
+    Views opt out with ``@use_primary``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = replica_aliases()
+        alias = None
+        if replicas and request.method in SAFE_METHODS and not self.is_sticky(request):
+            alias = random.choice(replicas)
+
+        state = RoutingState(alias)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if response.streaming and not isinstance(response, FileResponse):
+            # Streamed bodies are generated after this returns
+            response.streaming_content = _routed_stream(response.streaming_content, state)
+
+        if replicas and (state.wrote or request.method not in SAFE_METHODS):
+            seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+            response.set_cookie(
+                STICKY_COOKIE, str(time.time() + seconds), max_age=seconds,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    @staticmethod
+    def is_sticky(request):
+        try:
+            return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if getattr(view_func, 'use_primary_db', False) or getattr(view_class, 'use_primary_db', False):
+            state = _state.get()
+            if state is not None:
+                state.read_alias = None
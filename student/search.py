@@ -0,0 +1,175 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Lookup, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from django.db.models.lookups import GreaterThanOrEqual, LessThan, StartsWith
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+FTS_TABLE = 'student_search'
+
+# Longest roll number (in digits) expanded by the prefix fast path
+MAX_ROLL_DIGITS = 9
+
+
+def roll_number_prefix_q(digits):
+    """
+    Match roll numbers starting with ``digits`` using index-friendly ranges,
+    e.g. "12" -> 12, 120-129, 1200-1299, ...
+    """
+    prefix = int(digits)
+    condition = Q(roll_number=prefix)
+    for width in range(1, MAX_ROLL_DIGITS - len(digits) + 1):
+        low = prefix * 10 ** width
+        condition |= Q(roll_number__gte=low, roll_number__lt=low + 10 ** width)
+    return condition
+
+
+def email_prefix_q(prefix):
+    """
+    Match emails starting with ``prefix``, ignoring case, as a range on the
+    lower(email) index (SQLite cannot use an index for its LIKE).
+    """
+    prefix = prefix.lower()
+    return Q(GreaterThanOrEqual(Lower('email'), prefix), LessThan(Lower('email'), prefix + '\U0010ffff'))
+
+
+class ILike(Lookup):
+    """
+    PostgreSQL ``ILIKE``. Unlike ``icontains``, which compiles to
+    ``UPPER(col) LIKE UPPER(...)``, it can be served by a trigram index on
+    the plain column.
+    """
+    lookup_name = 'ilike'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} ILIKE {rhs}', (*lhs_params, *rhs_params)
+
+
+class BaseSearchBackend:
+    """
+    Search students by name, roll number or email.
+
+    Numeric terms and email prefixes (an "@" after the first character) take
+    fast paths on the indexed roll_number and lower(email) columns; anything
+    else, "@domain" included, goes to ``search_text``.
+    """
+
+    def search(self, queryset, term):
+        term = term.strip()
+        if not term:
+            return queryset
+        if term.isdigit() and len(term) <= MAX_ROLL_DIGITS:
+            return queryset.filter(roll_number_prefix_q(term))
+        if '@' in term[1:]:
+            return self.search_email_prefix(queryset, term)
+        return self.search_text(queryset, term)
+
+    def search_email_prefix(self, queryset, prefix):
+        return queryset.filter(email_prefix_q(prefix))
+
+    def search_text(self, queryset, term):
+        raise NotImplementedError
+
+    def index(self, students):
+        """Add or refresh ``students`` in the search index"""
+
+    def remove(self, student_ids):
+        """Drop ``student_ids`` from the search index"""
+
+    def rebuild(self):
+        """Rebuild the whole search index"""
+
+
+class BasicSearchBackend(BaseSearchBackend):
+    """Unindexed substring search, for databases without a dedicated backend"""
+
+    def search_text(self, queryset, term):
+        return queryset.filter(Q(name__icontains=term) | Q(email__icontains=term))
+
+
+class PostgresTrigramSearchBackend(BasicSearchBackend):
+    """
+    Substring search served by the pg_trgm GIN indexes on name and email
+    (created by migration 0005), and email prefixes by the lower(email)
+    index of migration 0009. The database keeps those indexes current, so
+    there is nothing to maintain here.
+    """
+
+    def search_text(self, queryset, term):
+        pattern = f'%{connection.ops.prep_for_like_query(term)}%'
+        return queryset.filter(Q(ILike(F('name'), pattern)) | Q(ILike(F('email'), pattern)))
+
+    def search_email_prefix(self, queryset, prefix):
+        # LIKE 'prefix%' on the lower(email) text_pattern_ops index; a range
+        # would follow the database collation, which need not sort by prefix
+        return queryset.filter(StartsWith(Lower('email'), prefix.lower()))
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """Prefix search over an FTS5 table mirroring name, email and roll number"""
+
+    def search_text(self, queryset, term):
+        tokens = re.findall(r'\w+', term)
+        if not tokens:
+            return queryset.none()
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        )
+
+    def index(self, students):
+        rows = [(student.pk, student.name, student.email, str(student.roll_number)) for student in students]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, email, roll_number) VALUES (%s, %s, %s, %s)', rows
+            )
+
+    def remove(self, student_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in student_ids])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, email, roll_number) '
+                f'SELECT id, name, email, CAST(roll_number AS TEXT) FROM student_student'
+            )
+
+
+DEFAULT_BACKENDS = {
+    'sqlite': 'student.search.SQLiteFTSSearchBackend',
+    'postgresql': 'student.search.PostgresTrigramSearchBackend',
+}
+
+
+def get_search_backend():
+    """
+    Return the search backend named by STUDENT_SEARCH_BACKEND, or the default
+    one for the database in use.
+    """
+    path = getattr(settings, 'STUDENT_SEARCH_BACKEND', None)
+    if not path:
+        path = DEFAULT_BACKENDS.get(connection.vendor, 'student.search.BasicSearchBackend')
+    return import_string(path)()
+
+
+def search_students(queryset, term):
+    return get_search_backend().search(queryset, term)
+
+
+class StudentSearchFilter(filters.SearchFilter):
+    """DRF search filter that delegates to the configured search backend"""
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '')
+        return search_students(queryset, term)
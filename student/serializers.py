@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from .archival import validate_open_year
 from .models import (
     Student, Course, Enrollment, Attendance, 
-    Assignment, Submission, Notification, Announcement
+    Assignment, Submission, Notification, Announcement, Job
 )
 
 class StudentSerializer(serializers.ModelSerializer):
@@ -13,15 +14,21 @@ class StudentSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_attendance_percentage(self, obj):
+        # Use the value annotated by StudentViewSet when available
+        if hasattr(obj, 'attendance_percentage'):
+            return obj.attendance_percentage
         return obj.get_attendance_percentage()
     
     def get_enrolled_courses_count(self, obj):
-        return obj.enrollments.filter(is_active=True).count()
+        if hasattr(obj, 'active_enrollments_count'):
+            return obj.active_enrollments_count
+        return obj.get_enrolled_courses().count()
 
 
 class CourseSerializer(serializers.ModelSerializer):
-    teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True)
+    teacher_name = serializers.CharField(source='get_teacher_name', read_only=True)
     enrolled_students_count = serializers.SerializerMethodField()
+    assignments_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
@@ -29,6 +36,9 @@ class CourseSerializer(serializers.ModelSerializer):
     
     def get_enrolled_students_count(self, obj):
         return obj.get_enrolled_students_count()
+    
+    def get_assignments_count(self, obj):
+        return obj.get_assignments_count()
 
 
 class EnrollmentSerializer(serializers.ModelSerializer):
@@ -47,6 +57,35 @@ class AttendanceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attendance
         fields = '__all__'
+    
+    def validate_date(self, value):
+        validate_open_year(value)
+        return value
+
+
+class AttendanceRecordSerializer(serializers.Serializer):
+    student = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Attendance.STATUS_CHOICES)
+
+
+class AttendanceBatchSerializer(serializers.Serializer):
+    """A whole roster of attendance for one course and date"""
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.filter(is_active=True))
+    date = serializers.DateField(validators=[validate_open_year])
+    records = AttendanceRecordSerializer(many=True, allow_empty=False)
+
+
+class MarksRecordSerializer(serializers.Serializer):
+    student = serializers.IntegerField()
+    # Checked row by row by save_marks_bulk() so one bad value doesn't reject the batch
+    marks = serializers.CharField()
+
+
+class MarksBatchSerializer(serializers.Serializer):
+    """Marks for many students, optionally limited to one class and section"""
+    class_name = serializers.CharField(required=False)
+    section = serializers.CharField(required=False)
+    records = MarksRecordSerializer(many=True, allow_empty=False)
 
 
 class AssignmentSerializer(serializers.ModelSerializer):
@@ -80,6 +119,17 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class MarkReadSerializer(serializers.Serializer):
+    """Which notifications to mark as read: a list of ids, everything up to a time, or both"""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
+    up_to = serializers.DateTimeField(required=False)
+    
+    def validate(self, attrs):
+        if 'ids' not in attrs and 'up_to' not in attrs:
+            raise serializers.ValidationError('Pass "ids", "up_to" or both.')
+        return attrs
+
+
 class AnnouncementSerializer(serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     is_expired = serializers.SerializerMethodField()
@@ -90,3 +140,70 @@ class AnnouncementSerializer(serializers.ModelSerializer):
     
     def get_is_expired(self, obj):
         return obj.is_expired()
+
+
+class ImportJobParamsSerializer(serializers.Serializer):
+    upsert = serializers.BooleanField(default=False)
+
+
+class ExportJobParamsSerializer(serializers.Serializer):
+    # student_list filters, as a query string
+    query = serializers.CharField(default='', allow_blank=True, max_length=2000)
+
+
+class StudentReportJobParamsSerializer(serializers.Serializer):
+    student_id = serializers.IntegerField()
+    
+    def validate_student_id(self, value):
+        if not Student.objects.filter(pk=value, is_active=True).exists():
+            raise serializers.ValidationError('No active student with this id.')
+        return value
+
+
+class ClassReportsJobParamsSerializer(serializers.Serializer):
+    class_name = serializers.CharField(default='', allow_blank=True, max_length=50)
+    section = serializers.CharField(default='', allow_blank=True, max_length=10)
+    format = serializers.ChoiceField(choices=['zip', 'pdf'], default='zip')
+
+
+# Job kinds users may submit through the API, with the params each accepts.
+# Everything else (removals, notification fan-out, pruning) is started by
+# the application itself.
+SUBMITTABLE_JOBS = {
+    'import_students': ImportJobParamsSerializer,
+    'export_excel': ExportJobParamsSerializer,
+    'student_report': StudentReportJobParamsSerializer,
+    'class_reports': ClassReportsJobParamsSerializer,
+}
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'progress', 'params', 'input_file', 'result_file',
+            'message', 'error', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = [
+            'status', 'progress', 'result_file', 'message', 'error',
+            'created_at', 'started_at', 'finished_at',
+        ]
+    
+    def validate_kind(self, value):
+        if value not in SUBMITTABLE_JOBS:
+            raise serializers.ValidationError(f'Jobs of kind "{value}" cannot be submitted.')
+        return value
+    
+    def validate(self, attrs):
+        params = SUBMITTABLE_JOBS[attrs['kind']](data=attrs.get('params') or {})
+        if not params.is_valid():
+            raise serializers.ValidationError({'params': params.errors})
+        attrs['params'] = params.validated_data
+        
+        input_file = attrs.get('input_file')
+        if attrs['kind'] == 'import_students':
+            if input_file is None or not input_file.name.endswith('.csv'):
+                raise serializers.ValidationError({'input_file': 'Upload the students as a CSV file.'})
+        elif input_file is not None:
+            raise serializers.ValidationError({'input_file': 'This kind of job takes no input file.'})
+        return attrs
@@ -0,0 +1,93 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .attendance import apply_attendance_delta
+from .jobs import enqueue
+from .metrics import invalidate_dashboard_metrics
+from .models import Student, Course, Attendance, Notification, Assignment, Announcement
+from .notifications import invalidate_unread_count, push_notification
+from .search import get_search_backend
+
+
+@receiver([post_save, post_delete], sender=Student)
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=Attendance)
+def invalidate_dashboard_cache(sender, **kwargs):
+    """Drop cached dashboard metrics when the underlying data changes"""
+    invalidate_dashboard_metrics()
+
+
+@receiver(post_save, sender=Student)
+def index_student(sender, instance, **kwargs):
+    """Keep the search index in sync with the student"""
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Student)
+def unindex_student(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+def _summary_key(attendance):
+    # Read from __dict__ so deferred fields are never loaded here
+    values = attendance.__dict__
+    return values.get('student_id'), values.get('course_id'), values.get('status')
+
+
+@receiver(post_init, sender=Attendance)
+def remember_attendance_state(sender, instance, **kwargs):
+    """Remember what this row currently contributes to the attendance summary"""
+    instance._summary_key = _summary_key(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Attendance)
+def update_attendance_summary_on_save(sender, instance, created, **kwargs):
+    """Move this row's contribution to the attendance summary"""
+    old_key = None if created else instance._summary_key
+    new_key = _summary_key(instance)
+    if old_key == new_key or new_key[2] is None:
+        return
+    if old_key and None not in (old_key[0], old_key[2]):
+        apply_attendance_delta(*old_key, -1)
+    apply_attendance_delta(*new_key, 1)
+    instance._summary_key = new_key
+
+
+@receiver(post_delete, sender=Attendance)
+def update_attendance_summary_on_delete(sender, instance, **kwargs):
+    """Remove this row's contribution from the attendance summary"""
+    student_id, course_id, status = instance._summary_key or _summary_key(instance)
+    apply_attendance_delta(student_id, course_id, status, -1)
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def refresh_unread_count(sender, instance, created=False, **kwargs):
+    """Drop the cached unread count and push new notifications to open sockets"""
+    invalidate_unread_count(instance.user_id)
+    if created:
+        transaction.on_commit(lambda: push_notification(instance))
+
+
+@receiver(post_save, sender=Assignment)
+@receiver(post_save, sender=Announcement)
+def fan_out_notifications(sender, instance, created, raw=False, **kwargs):
+    """Notify the recipients of a new assignment or announcement in the background"""
+    if not created or raw or not instance.is_active:
+        return
+    if sender is Assignment:
+        enqueue('notify_assignment', {'assignment_id': instance.pk}, user=instance.created_by)
+    else:
+        enqueue('notify_announcement', {'announcement_id': instance.pk}, user=instance.created_by)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """Apply SQLITE_PRAGMAS to each new SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .jobs import run_job
+
+
+@shared_task
+def run_job_task(job_id):
+    """Run a background job on a Celery worker"""
+    run_job(job_id)
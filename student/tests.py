@@ -0,0 +1,381 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .archival import academic_year_dates, archive_academic_year, current_academic_year
+from .attendance import mark_attendance_bulk, verify_attendance_summary
+from .importers import StudentImporter
+from .middleware import QueryBudgetExceeded
+from .models import (
+    Announcement, Assignment, Attendance, AttendanceSummary, Course, Enrollment, Job, Notification,
+    Student, Submission,
+)
+from .pagination import KeysetOptInPagination, KeysetPaginator
+from .serializers import AttendanceSerializer
+
+
+def create_students(count, course=None):
+    students = Student.objects.bulk_create([
+        Student(name=f'Student {i}', roll_number=i, email=f'student{i}@example.com',
+                marks=40 + i % 60, class_name='10', section='A')
+        for i in range(1, count + 1)
+    ])
+    if course is not None:
+        Enrollment.objects.bulk_create([Enrollment(student=student, course=course) for student in students])
+        # In the current academic year, which attendance pages list by default
+        start, _ = academic_year_dates(current_academic_year())
+        for student in students:
+            Attendance.objects.create(student=student, course=course, date=start, status='P')
+            Attendance.objects.create(student=student, course=course, date=start + timedelta(days=1), status='A')
+    return students
+
+
+class StudentListQueryCountTests(APITestCase):
+    """The student list must not issue per-row queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('teacher', password='password')
+        course = Course.objects.create(code='MATH101', name='Mathematics')
+        create_students(60, course)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def list_queries(self, page_size):
+        # The page total is cached between requests
+        cache.clear()
+        with mock.patch.object(KeysetOptInPagination, 'page_size', page_size):
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse('student-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), page_size)
+        return response
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.list_queries(5)
+        response = self.list_queries(50)
+        row = response.data['results'][0]
+        self.assertEqual(row['attendance_percentage'], 50.0)
+        self.assertEqual(row['enrolled_courses_count'], 1)
+
+
+@mock.patch.object(KeysetOptInPagination, 'page_size', 4)
+class KeysetPaginationTests(APITestCase):
+    """Cursor pages of the API walk every row exactly once, in both directions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('teacher', password='password')
+        students = create_students(10)
+        # Three students per mark, so pages split runs of equal sort keys
+        for student in students:
+            student.marks = student.roll_number % 3 * 10 + 50
+        Student.objects.bulk_update(students, ['marks'])
+        # Equal timestamps with microseconds, which cursors must round-trip exactly
+        Student.objects.update(created_at=timezone.now().replace(microsecond=123456))
+        cls.expected = list(Student.objects.order_by('marks', 'pk').values_list('pk', flat=True))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, direction):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data[direction]
+        return pages
+
+    def test_pages_forward_and_back(self):
+        pages = self.walk(reverse('student-list') + '?ordering=marks&cursor=', 'next')
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        self.assertEqual(sum(pages, []), self.expected)
+
+        last_cursor = KeysetPaginator(Student.objects.order_by('marks'), 4).last_cursor
+        back = self.walk(reverse('student-list') + f'?ordering=marks&cursor={last_cursor}', 'previous')
+        self.assertEqual(sum(reversed(back), []), self.expected)
+
+    def test_datetime_cursor(self):
+        paginator = KeysetPaginator(Student.objects.order_by('-created_at'), 3)
+        seen = []
+        page = paginator.page()
+        while True:
+            seen.extend(student.pk for student in page)
+            if not page.has_next():
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(seen, sorted(self.expected, reverse=True))
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get(reverse('student-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+def create_school(user, students=30):
+    """A populated school: enough rows in every list that per-row queries would show"""
+    courses = [
+        Course.objects.create(code=f'C{i}', name=f'Course {i}', teacher=user) for i in range(3)
+    ]
+    roster = create_students(students, courses[0])
+    Enrollment.objects.bulk_create([
+        Enrollment(student=student, course=course) for student in roster for course in courses[1:]
+    ])
+    for course in courses:
+        assignment = Assignment.objects.create(
+            course=course, title=f'Homework {course.code}', description='Exercises',
+            due_date=timezone.now() + timedelta(days=7), created_by=user,
+        )
+        Submission.objects.bulk_create([
+            Submission(assignment=assignment, student=student, marks_obtained=70, graded_by=user)
+            for student in roster
+        ])
+    for i in range(5):
+        Announcement.objects.create(title=f'Announcement {i}', content='News', created_by=user, priority=i)
+    Notification.objects.bulk_create([
+        Notification(user=user, title=f'Notice {i}', message='Message') for i in range(20)
+    ])
+    Job.objects.bulk_create([Job(kind='export_excel', created_by=user) for _ in range(5)])
+    return courses, roster
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET={**settings.QUERY_BUDGET, 'RAISE': True})
+class QueryBudgetTests(TestCase):
+    """Every list view and viewset stays within its QUERY_BUDGET on a populated school"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.courses, cls.students = create_school(cls.user)
+        cls.assignment = Assignment.objects.filter(course=cls.courses[0]).get()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def views(self):
+        student, course = self.students[0].pk, self.courses[0].pk
+        return {
+            'dashboard': ([], {}),
+            'student_list': ([], {}),
+            'student_detail': ([student], {}),
+            'course_list': ([], {}),
+            'course_detail': ([course], {}),
+            'attendance_list': ([], {}),
+            'attendance_report': ([], {}),
+            'mark_attendance': ([], {'course': course}),
+            'assignment_list': ([], {}),
+            'assignment_detail': ([self.assignment.pk], {}),
+            'announcement_list': ([], {}),
+            'notification_list': ([], {}),
+            'gradebook': ([], {'class_name': '10'}),
+            'class_reports': ([], {}),
+            'student-list': ([], {}),
+            'student-detail': ([student], {}),
+            'student-attendance': ([student], {}),
+            'student-courses': ([student], {}),
+            'course-list': ([], {}),
+            'course-detail': ([course], {}),
+            'course-students': ([course], {}),
+            'enrollment-list': ([], {}),
+            'attendance-list': ([], {}),
+            'assignment-list': ([], {}),
+            'submission-list': ([], {}),
+            'notification-list': ([], {}),
+            'announcement-list': ([], {}),
+            'job-list': ([], {}),
+            'api_stats': ([], {}),
+            'api_analytics': ([], {}),
+        }
+
+    def test_views_within_budget(self):
+        for name, (args, params) in self.views().items():
+            with self.subTest(view=name):
+                self.assertIn(name, settings.QUERY_BUDGET['VIEWS'])
+                # Cached metrics and page totals would hide queries
+                cache.clear()
+                response = self.client.get(reverse(name, args=args), params)
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_BUDGET={'DEFAULT': 15, 'VIEWS': {'student_list': 1}, 'RAISE': True})
+    def test_over_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('student_list'))
+
+
+class StudentImporterTests(TestCase):
+    """CSV imports validate each row on its own and upsert only the columns given"""
+
+    def run_import(self, text, **kwargs):
+        return StudentImporter(**kwargs).run(SimpleUploadedFile('students.csv', text.encode()))
+
+    def test_upsert_leaves_missing_columns_alone(self):
+        Student.objects.create(name='Old Name', roll_number=1, email='one@example.com', marks=50, phone='555')
+        result = self.run_import('name,roll_number,email,marks\nNew Name,1,one@example.com,95\n', upsert=True)
+        self.assertEqual((result.updated, result.errors), (1, []))
+        student = Student.objects.get(roll_number=1)
+        self.assertEqual((student.name, student.phone, student.grade), ('New Name', '555', 'A'))
+
+    def test_overlong_values_fail_only_their_row(self):
+        result = self.run_import(
+            'name,roll_number,email,marks\n'
+            f'{"x" * 150},1,one@example.com,80\n'
+            f'Valid,2,{"y" * 250}@example.com,80\n'
+            'Valid,3,three@example.com,80\n'
+        )
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _, _ in result.errors], [2, 3])
+        self.assertIn('at most 100 characters', result.errors[0][2])
+        self.assertQuerySetEqual(Student.objects.values_list('roll_number', flat=True), [3])
+
+
+class AttendanceSummaryTests(TestCase):
+    """The denormalized AttendanceSummary keeps matching the raw attendance rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(code='MATH101', name='Mathematics')
+        cls.students = create_students(3, cls.course)
+        # A day create_students() leaves unmarked
+        cls.day = academic_year_dates(current_academic_year())[0] + timedelta(days=2)
+
+    def assertSummaryConsistent(self):
+        self.assertEqual(verify_attendance_summary(), [])
+
+    def summary(self, student, course=None):
+        return AttendanceSummary.objects.get(student=student, course=course)
+
+    def test_save_remark_and_delete(self):
+        student = self.students[0]
+        attendance = Attendance.objects.create(student=student, course=self.course, date=self.day, status='P')
+        self.assertSummaryConsistent()
+        self.assertEqual(self.summary(student, self.course).present, 2)
+
+        attendance.status = 'L'
+        attendance.save()
+        self.assertSummaryConsistent()
+        summary = self.summary(student)
+        self.assertEqual((summary.total, summary.present, summary.late), (3, 1, 1))
+
+        attendance.delete()
+        self.assertSummaryConsistent()
+        self.assertEqual(self.summary(student).total, 2)
+
+    def test_bulk_mark_and_remark(self):
+        statuses = {student.pk: 'P' for student in self.students}
+        self.assertEqual(mark_attendance_bulk(self.course, self.day, statuses), (3, []))
+        self.assertSummaryConsistent()
+
+        statuses[self.students[0].pk] = 'A'
+        mark_attendance_bulk(self.course, self.day, statuses)
+        self.assertSummaryConsistent()
+        summary = self.summary(self.students[0], self.course)
+        self.assertEqual((summary.total, summary.present, summary.absent), (3, 1, 2))
+
+
+    def test_archiving_leaves_summary_unchanged(self):
+        last_year = current_academic_year() - 1
+        start, _ = academic_year_dates(last_year)
+        for student in self.students:
+            Attendance.objects.create(student=student, course=self.course, date=start, status='E')
+        before = self.summary(self.students[0]).total
+
+        self.assertEqual(archive_academic_year(last_year), 3)
+        self.assertFalse(Attendance.objects.filter(date=start).exists())
+        self.assertSummaryConsistent()
+        self.assertEqual(self.summary(self.students[0]).total, before)
+
+    def test_archived_year_rejects_writes(self):
+        last_year = current_academic_year() - 1
+        archive_academic_year(last_year)
+        day, _ = academic_year_dates(last_year)
+        student = self.students[0]
+
+        with self.assertRaises(ValidationError):
+            mark_attendance_bulk(self.course, day, {student.pk: 'P'})
+        with self.assertRaises(ValidationError) as raised:
+            Attendance(student=student, course=self.course, date=day, status='P').full_clean()
+        self.assertIn('date', raised.exception.message_dict)
+        serializer = AttendanceSerializer(data={'student': student.pk, 'course': self.course.pk,
+                                                'date': day.isoformat(), 'status': 'P'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('date', serializer.errors)
+        self.assertSummaryConsistent()
+
+class StudentGradeTests(TestCase):
+    """Bulk writes keep grade in step with marks, as save() does"""
+
+    def setUp(self):
+        self.students = create_students(3)
+
+    def grades(self):
+        return list(Student.objects.order_by('roll_number').values_list('grade', flat=True))
+
+    def test_bulk_create(self):
+        self.assertEqual(self.grades(), ['F', 'F', 'F'])
+
+    def test_update(self):
+        Student.objects.filter(roll_number=1).update(marks=95)
+        # 42 + 30, graded in the same UPDATE
+        Student.objects.filter(roll_number=2).update(marks=F('marks') + 30)
+        self.assertEqual(self.grades(), ['A', 'C', 'F'])
+
+    def test_bulk_update(self):
+        for student, marks in zip(self.students, [85, 75, 10]):
+            student.marks = marks
+        Student.objects.bulk_update(self.students, ['marks'])
+        self.assertEqual(self.grades(), ['B', 'C', 'F'])
+
+    def test_regrade_after_boundaries_change(self):
+        # Marks are 41, 42 and 43
+        with override_settings(GRADE_BOUNDARIES={'A': 42, 'F': 0}):
+            self.assertEqual(Student.objects.regrade(), 2)
+            self.assertEqual(self.grades(), ['F', 'A', 'A'])
+            self.assertEqual(Student.objects.regrade(), 0)
+            self.assertEqual(
+                list(Student._meta.get_field('grade').choices), [('A', 'A Grade (42-100)'), ('F', 'F Grade (0-41)')]
+            )
+
+
+class GradebookQueryCountTests(TestCase):
+    """The gradebook must not issue per-student queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('teacher', password='password')
+        students = create_students(55)
+        Student.objects.filter(pk__in=[student.pk for student in students[:5]]).update(class_name='9')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def render_queries(self, class_name, size):
+        # The notification badge count is cached between requests
+        cache.clear()
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse('gradebook'), {'class_name': class_name})
+        self.assertEqual(len(response.context['students']), size)
+
+    def save_queries(self, class_name, size):
+        pks = Student.objects.filter(class_name=class_name).values_list('pk', flat=True)
+        marks = {f'marks_{pk}': '77' for pk in pks}
+        with self.assertNumQueries(8):
+            response = self.client.post(reverse('gradebook') + f'?class_name={class_name}', marks)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Student.objects.filter(class_name=class_name, grade='C').count(), size)
+
+    def test_query_count_does_not_grow_with_class_size(self):
+        self.render_queries('9', 5)
+        self.render_queries('10', 50)
+        self.save_queries('9', 5)
+        self.save_queries('10', 50)
@@ -16,6 +16,8 @@ urlpatterns = [
     path('students/export/excel/', views.export_excel, name='export_excel'),
     path('students/import/', views.import_csv, name='import_csv'),
     path('students/<int:pk>/report/', views.student_report_pdf, name='student_report_pdf'),
+    path('students/reports/', views.class_reports, name='class_reports'),
+    path('students/gradebook/', views.gradebook, name='gradebook'),
     
     # Courses
     path('courses/', views.course_list, name='course_list'),
@@ -44,4 +46,9 @@ urlpatterns = [
     # Notifications
     path('notifications/', views.notification_list, name='notification_list'),
     path('notifications/<int:pk>/read/', views.mark_notification_read, name='mark_notification_read'),
+    
+    # Background jobs
+    path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:pk>/status/', views.job_status, name='job_status'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job_download'),
 ]
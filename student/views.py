@@ -1,84 +1,52 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q, Avg, Count
-from django.http import HttpResponse, JsonResponse
-from .models import Student, Course, Enrollment, Attendance, Assignment, Submission, Notification, Announcement
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import JsonResponse, FileResponse, Http404, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_date
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.urls import reverse
+from .models import Student, Course, Enrollment, Assignment, Submission, Notification, Announcement
 from .forms import StudentForm, StudentImportForm
-import csv
-import io
-from openpyxl import Workbook
+from .archival import (
+    academic_year_label, attendance_for_year, available_years, current_academic_year, requested_year,
+)
+from .attendance import build_attendance_report, mark_attendance_bulk
+from .exports import iter_students_csv, gzip_stream
+from .filters import filter_students
+from .gradebook import gradebook_students, save_marks_bulk
+from .pagination import paginate_keyset
+from .removal import batch_size as removal_batch_size, remove_students
+from .jobs import enqueue, visible_jobs
+from .routing import use_primary
+from .metrics import dashboard_metrics
+from .notifications import mark_read
+import os
 from django.views.decorators.http import require_POST
 from django.views.decorators.http import require_POST
 
 def dashboard(request):
     """Dashboard with analytics"""
-    total_students = Student.objects.filter(is_active=True).count()
-    average_marks = Student.objects.filter(is_active=True).aggregate(Avg('marks'))['marks__avg'] or 0
-    
-    # Grade distribution
-    grade_distribution = Student.objects.filter(is_active=True).values('grade').annotate(count=Count('grade')).order_by('grade')
-    
-    # Top performers
-    top_performers = Student.objects.filter(is_active=True).order_by('-marks')[:5]
-    
-    # Recent students
-    recent_students = Student.objects.filter(is_active=True).order_by('-created_at')[:5]
+    metrics = dashboard_metrics()
     
     context = {
-        'total_students': total_students,
-        'average_marks': round(average_marks, 2),
-        'grade_distribution': list(grade_distribution),
-        'top_performers': top_performers,
-        'recent_students': recent_students,
+        'total_students': metrics['total_students'],
+        'average_marks': metrics['average_marks'],
+        'grade_distribution': metrics['grade_distribution'],
+        'top_performers': metrics['top_performers'],
+        'recent_students': metrics['recent_students'],
     }
     return render(request, 'student/dashboard.html', context)
 
 def student_list(request):
     """Student list with search, filter, sort, and pagination"""
-    students = Student.objects.filter(is_active=True)
-    
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        students = students.filter(
-            Q(name__icontains=search_query) |
-            Q(roll_number__icontains=search_query) |
-            Q(email__icontains=search_query)
-        )
+    students, filters = filter_students(Student.objects.filter(is_active=True), request.GET)
     
-    # Filter by grade
-    grade_filter = request.GET.get('grade', '')
-    if grade_filter:
-        students = students.filter(grade=grade_filter)
-    
-    # Filter by marks range
-    marks_min = request.GET.get('marks_min', '')
-    marks_max = request.GET.get('marks_max', '')
-    if marks_min:
-        students = students.filter(marks__gte=marks_min)
-    if marks_max:
-        students = students.filter(marks__lte=marks_max)
-    
-    # Sort functionality
-    sort_by = request.GET.get('sort', '-created_at')
-    valid_sorts = ['name', '-name', 'roll_number', '-roll_number', 'marks', '-marks', 'created_at', '-created_at']
-    if sort_by in valid_sorts:
-        students = students.order_by(sort_by)
-    
-    # Pagination
-    paginator = Paginator(students, 10)  # 10 students per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on the active sort (no COUNT/OFFSET per page)
+    page_obj = paginate_keyset(request, students, 10)  # 10 students per page
     
-    context = {
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'grade_filter': grade_filter,
-        'marks_min': marks_min,
-        'marks_max': marks_max,
-        'sort_by': sort_by,
-    }
+    context = {'page_obj': page_obj, **filters}
     return render(request, 'student/student_list.html', context)
 
 def student_detail(request, pk):
@@ -112,69 +80,56 @@ def student_update(request, pk):
 def student_delete(request, pk):
     student = get_object_or_404(Student, pk=pk)
     if request.method == 'POST':
-        student.delete()
+        remove_students([student.pk])
         messages.success(request, 'Student deleted successfully!')
         return redirect('student_list')
     return render(request, 'student/student_confirm_delete.html', {'student': student})
 
 @require_POST
 def bulk_delete(request):
-    """Bulk delete students"""
-    student_ids = request.POST.getlist('student_ids[]')
-    if student_ids:
-        Student.objects.filter(id__in=student_ids).delete()
-        return JsonResponse({'success': True, 'message': f'{len(student_ids)} students deleted successfully!'})
-    return JsonResponse({'success': False, 'message': 'No students selected'})
+    """Bulk delete (or, with archive=1, deactivate) students"""
+    student_ids = [int(pk) for pk in request.POST.getlist('student_ids[]') if pk.isdigit()]
+    archive = request.POST.get('archive') == '1'
+    if not student_ids:
+        return JsonResponse({'success': False, 'message': 'No students selected'})
+    
+    action = 'archived' if archive else 'deleted'
+    # One chunk runs inline; anything larger goes to the background
+    if len(student_ids) > removal_batch_size():
+        job = _enqueue(request, 'remove_students', {'student_ids': student_ids, 'archive': archive})
+        return JsonResponse({
+            'success': True,
+            'message': f'{len(student_ids)} students are being {action} in the background.',
+            'job_url': reverse('job_detail', args=[job.pk]),
+        })
+    removed = remove_students(student_ids, archive=archive)
+    return JsonResponse({'success': True, 'message': f'{removed} students {action} successfully!'})
 
 def export_csv(request):
-    """Export students to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="students.csv"'
+    """Export students to CSV, honouring the student_list filters"""
+    students, _ = filter_students(Student.objects.filter(is_active=True), request.GET)
+    content = iter_students_csv(students)
     
-    writer = csv.writer(response)
-    writer.writerow(['Name', 'Roll Number', 'Email', 'Phone', 'Marks', 'Grade', 'City', 'State'])
+    # Compress on the fly when asked to and the client accepts it
+    use_gzip = request.GET.get('gzip') and 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if use_gzip:
+        content = gzip_stream(content)
     
-    students = Student.objects.filter(is_active=True).values_list(
-        'name', 'roll_number', 'email', 'phone', 'marks', 'grade', 'city', 'state'
-    )
-    for student in students:
-        writer.writerow(student)
+    response = StreamingHttpResponse(content, content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="students.csv"'
+    if use_gzip:
+        response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
     
     return response
 
 def export_excel(request):
-    """Export students to Excel"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Students"
-    
-    # Headers
-    headers = ['Name', 'Roll Number', 'Email', 'Phone', 'Marks', 'Grade', 'City', 'State', 'Created At']
-    ws.append(headers)
-    
-    # Data
-    students = Student.objects.filter(is_active=True)
-    for student in students:
-        ws.append([
-            student.name,
-            student.roll_number,
-            student.email,
-            student.phone or '',
-            student.marks,
-            student.grade,
-            student.city or '',
-            student.state or '',
-            student.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        ])
-    
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="students.xlsx"'
-    wb.save(response)
-    
-    return response
+    """Export students to Excel in the background, honouring the student_list filters"""
+    job = _enqueue(request, 'export_excel', {'query': request.GET.urlencode()})
+    return redirect('job_detail', pk=job.pk)
 
 def import_csv(request):
-    """Import students from CSV"""
+    """Import students from CSV in the background"""
     if request.method == 'POST':
         form = StudentImportForm(request.POST, request.FILES)
         if form.is_valid():
@@ -184,34 +139,14 @@ def import_csv(request):
                 messages.error(request, 'Please upload a CSV file.')
                 return redirect('import_csv')
             
-            try:
-                decoded_file = csv_file.read().decode('utf-8')
-                io_string = io.StringIO(decoded_file)
-                reader = csv.DictReader(io_string)
-                
-                success_count = 0
-                error_count = 0
-                
-                for row in reader:
-                    try:
-                        Student.objects.create(
-                            name=row.get('name', ''),
-                            roll_number=int(row.get('roll_number', 0)),
-                            email=row.get('email', ''),
-                            phone=row.get('phone', ''),
-                            marks=float(row.get('marks', 0)),
-                        )
-                        success_count += 1
-                    except Exception as e:
-                        error_count += 1
-                        continue
-                
-                messages.success(request, f'Successfully imported {success_count} students. {error_count} errors.')
-                return redirect('student_list')
-                
-            except Exception as e:
-                messages.error(request, f'Error processing file: {str(e)}')
-                return redirect('import_csv')
+            job = _enqueue(
+                request,
+                'import_students',
+                {'upsert': form.cleaned_data['upsert']},
+                input_file=csv_file,
+            )
+            messages.info(request, 'Import started. This page updates when it finishes.')
+            return redirect('job_detail', pk=job.pk)
     else:
         form = StudentImportForm()
     
@@ -222,7 +157,7 @@ def import_csv(request):
 
 def course_list(request):
     """List all courses"""
-    courses = Course.objects.filter(is_active=True)
+    courses = Course.objects.filter(is_active=True).with_stats()
     
     # Search
     search = request.GET.get('search', '')
@@ -237,8 +172,8 @@ def course_list(request):
 
 def course_detail(request, pk):
     """Course detail with enrolled students"""
-    course = get_object_or_404(Course, pk=pk)
-    enrollments = Enrollment.objects.filter(course=course, is_active=True)
+    course = get_object_or_404(Course.objects.with_stats(), pk=pk)
+    enrollments = Enrollment.objects.filter(course=course, is_active=True).select_related('student')
     assignments = Assignment.objects.filter(course=course, is_active=True)
     
     context = {
@@ -301,11 +236,50 @@ def course_delete(request, pk):
     return render(request, 'student/course_confirm_delete.html', {'course': course})
 
 
+# ==================== GRADEBOOK ====================
+
+def gradebook(request):
+    """Enter marks for a whole class at once"""
+    class_name = request.GET.get('class_name', '')
+    section = request.GET.get('section', '')
+    students = gradebook_students(class_name, section) if class_name else Student.objects.none()
+    
+    entered, errors = {}, {}
+    if request.method == 'POST' and class_name:
+        # Form fields are named marks_<student id>; blank means unchanged
+        for key, value in request.POST.items():
+            if key.startswith('marks_') and key[len('marks_'):].isdigit() and value.strip():
+                entered[int(key[len('marks_'):])] = value
+        saved, errors = save_marks_bulk(entered, students)
+        if not errors:
+            messages.success(request, f'Saved marks for {saved} students.')
+            return redirect(request.get_full_path())
+        messages.error(request, f'Saved marks for {saved} students; {len(errors)} rows need fixing.')
+    
+    students = list(students.only('pk', 'name', 'roll_number', 'section', 'marks', 'grade'))
+    for student in students:
+        student.entered_marks = entered.get(student.pk, student.marks)
+        student.marks_error = errors.get(student.pk)
+    
+    classes = (
+        Student.objects.filter(is_active=True).exclude(class_name__isnull=True).exclude(class_name='')
+        .values_list('class_name', flat=True).distinct().order_by('class_name')
+    )
+    context = {
+        'students': students,
+        'classes': classes,
+        'class_name': class_name,
+        'section': section,
+    }
+    return render(request, 'student/gradebook.html', context)
+
+
 # ==================== ATTENDANCE VIEWS ====================
 
 def attendance_list(request):
-    """View attendance records"""
-    attendances = Attendance.objects.all().order_by('-date')
+    """View attendance records of one academic year (the current one by default)"""
+    year = requested_year(request.GET) or current_academic_year()
+    attendances = attendance_for_year(year).select_related('student', 'course', 'marked_by').order_by('-date')
     
     # Filters
     student_id = request.GET.get('student')
@@ -322,10 +296,8 @@ def attendance_list(request):
     if status:
         attendances = attendances.filter(status=status)
     
-    # Pagination
-    paginator = Paginator(attendances, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (date, id)
+    page_obj = paginate_keyset(request, attendances, 20)
     
     students = Student.objects.filter(is_active=True)
     courses = Course.objects.filter(is_active=True)
@@ -334,6 +306,8 @@ def attendance_list(request):
         'page_obj': page_obj,
         'students': students,
         'courses': courses,
+        'year': year,
+        'years': [(value, academic_year_label(value)) for value in available_years()],
     }
     return render(request, 'student/attendance_list.html', context)
 
@@ -345,20 +319,17 @@ def mark_attendance(request):
         date = request.POST.get('date')
         
         course = get_object_or_404(Course, pk=course_id)
-        enrollments = Enrollment.objects.filter(course=course, is_active=True)
         
-        for enrollment in enrollments:
-            status = request.POST.get(f'status_{enrollment.student.id}')
-            if status:
-                Attendance.objects.update_or_create(
-                    student=enrollment.student,
-                    course=course,
-                    date=date,
-                    defaults={
-                        'status': status,
-                        'marked_by': request.user
-                    }
-                )
+        # Form fields are named status_<student id>
+        statuses = {}
+        for key, value in request.POST.items():
+            if key.startswith('status_') and key[len('status_'):].isdigit() and value:
+                statuses[int(key[len('status_'):])] = value
+        try:
+            mark_attendance_bulk(course, date, statuses, marked_by=request.user)
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+            return redirect('mark_attendance')
         
         messages.success(request, 'Attendance marked successfully!')
         return redirect('attendance_list')
@@ -369,30 +340,52 @@ def mark_attendance(request):
 
 def attendance_report(request):
     """Generate attendance report"""
-    students = Student.objects.filter(is_active=True)
-    
-    report_data = []
-    for student in students:
-        total = Attendance.objects.filter(student=student).count()
-        present = Attendance.objects.filter(student=student, status='P').count()
-        percentage = (present / total * 100) if total > 0 else 0
-        
-        report_data.append({
-            'student': student,
-            'total': total,
-            'present': present,
-            'percentage': round(percentage, 2)
-        })
-    
-    context = {'report_data': report_data}
+    course_id = request.GET.get('course', '')
+    if course_id and not course_id.isdigit():
+        messages.warning(request, 'Ignored an invalid course filter.')
+        course_id = ''
+    date_from = _report_date(request, 'date_from')
+    date_to = _report_date(request, 'date_to')
+    sort_by = request.GET.get('sort', 'name')
+
+    page_obj = build_attendance_report(
+        course=course_id or None,
+        date_from=date_from,
+        date_to=date_to,
+        sort=sort_by,
+        page=request.GET.get('page'),
+    )
+
+    courses = Course.objects.filter(is_active=True)
+
+    context = {
+        'page_obj': page_obj,
+        'courses': courses,
+        'course_id': course_id,
+        'date_from': date_from.isoformat() if date_from else '',
+        'date_to': date_to.isoformat() if date_to else '',
+        'sort_by': sort_by,
+    }
     return render(request, 'student/attendance_report.html', context)
 
 
+def _report_date(request, name):
+    """Parse a YYYY-MM-DD query parameter, warning about and ignoring bad values"""
+    value = request.GET.get(name, '')
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if value and parsed is None:
+        messages.warning(request, f'Ignored an invalid date: {value}')
+    return parsed
+
+
 # ==================== ASSIGNMENT VIEWS ====================
 
 def assignment_list(request):
     """List all assignments"""
-    assignments = Assignment.objects.filter(is_active=True).order_by('-due_date')
+    assignments = Assignment.objects.filter(is_active=True).select_related('course').order_by('-due_date')
     
     # Filter by course
     course_id = request.GET.get('course')
@@ -410,8 +403,8 @@ def assignment_list(request):
 
 def assignment_detail(request, pk):
     """Assignment detail with submissions"""
-    assignment = get_object_or_404(Assignment, pk=pk)
-    submissions = Submission.objects.filter(assignment=assignment)
+    assignment = get_object_or_404(Assignment.objects.select_related('course'), pk=pk)
+    submissions = Submission.objects.filter(assignment=assignment).select_related('student', 'assignment')
     
     context = {
         'assignment': assignment,
@@ -521,7 +514,7 @@ def submit_assignment(request, pk):
 
 def announcement_list(request):
     """List all announcements"""
-    announcements = Announcement.objects.filter(is_active=True).order_by('-priority', '-created_at')
+    announcements = Announcement.objects.filter(is_active=True).select_related('created_by').order_by('-priority', '-created_at')
     
     context = {'announcements': announcements}
     return render(request, 'student/announcement_list.html', context)
@@ -554,81 +547,96 @@ def announcement_create(request):
 def notification_list(request):
     """List user notifications"""
     notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
+    page_obj = paginate_keyset(request, notifications, 20)
     
-    context = {'notifications': notifications}
+    context = {'notifications': page_obj, 'page_obj': page_obj}
     return render(request, 'student/notification_list.html', context)
 
 
 def mark_notification_read(request, pk):
     """Mark notification as read"""
-    notification = get_object_or_404(Notification, pk=pk, user=request.user)
-    notification.is_read = True
-    notification.save()
+    if not mark_read(request.user, ids=[pk]):
+        get_object_or_404(Notification, pk=pk, user=request.user)
     
+    # Go back to the page the user was on rather than the first one
+    next_url = request.GET.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
     return redirect('notification_list')
 
 
 # ==================== PDF REPORT GENERATION ====================
 
 def student_report_pdf(request, pk):
-    """Generate PDF report for student"""
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from io import BytesIO
-    
+    """Generate PDF report for student in the background"""
     student = get_object_or_404(Student, pk=pk)
-    
-    # Create PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#6366f1'),
-        spaceAfter=30,
-        alignment=1  # Center
+    job = _enqueue(request, 'student_report', {'student_id': student.pk})
+    return redirect('job_detail', pk=job.pk)
+
+
+def class_reports(request):
+    """Generate report cards for a whole class or section in the background"""
+    if request.method == 'POST':
+        params = {
+            'class_name': request.POST.get('class_name', ''),
+            'section': request.POST.get('section', ''),
+            'format': request.POST.get('format', 'zip'),
+        }
+        job = _enqueue(request, 'class_reports', params)
+        return redirect('job_detail', pk=job.pk)
+    
+    classes = (
+        Student.objects.filter(is_active=True).exclude(class_name__isnull=True).exclude(class_name='')
+        .values_list('class_name', flat=True).distinct().order_by('class_name')
     )
-    elements.append(Paragraph('Student Report', title_style))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Student Info
-    data = [
-        ['Name:', student.name],
-        ['Roll Number:', str(student.roll_number)],
-        ['Email:', student.email],
-        ['Phone:', student.phone or 'N/A'],
-        ['Class:', student.class_name or 'N/A'],
-        ['Marks:', f'{student.marks}%'],
-        ['Grade:', student.grade],
-        ['Attendance:', f'{student.get_attendance_percentage()}%'],
-    ]
-    
-    table = Table(data, colWidths=[2*inch, 4*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-    ]))
-    
-    elements.append(table)
-    
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="student_report_{student.roll_number}.pdf"'
-    
-    return response
+    return render(request, 'student/class_reports.html', {'classes': classes})
+
+
+# ==================== BACKGROUND JOBS ====================
+
+SESSION_JOBS_KEY = 'job_ids'
+
+
+def _enqueue(request, kind, params, **kwargs):
+    """Enqueue a job for the current user, remembering anonymous users' jobs in their session"""
+    job = enqueue(kind, params, user=request.user, **kwargs)
+    if not request.user.is_authenticated:
+        request.session[SESSION_JOBS_KEY] = request.session.get(SESSION_JOBS_KEY, [])[-49:] + [job.pk]
+    return job
+
+
+def _get_job(request, pk):
+    """The job ``pk`` if the current user may see it, else 404"""
+    jobs = visible_jobs(request.user, request.session.get(SESSION_JOBS_KEY, []))
+    return get_object_or_404(jobs, pk=pk)
+
+
+def job_detail(request, pk):
+    """Status page for a background job"""
+    job = _get_job(request, pk)
+    return render(request, 'student/job_detail.html', {'job': job})
+
+
+@use_primary  # Workers update progress on the primary
+def job_status(request, pk):
+    """Poll the status of a background job"""
+    job = _get_job(request, pk)
+    return JsonResponse({
+        'id': job.pk,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message or '',
+        'error': job.error or '',
+        'finished': job.is_finished(),
+        'download_url': reverse('job_download', args=[job.pk]) if job.result_file else None,
+    })
+
+
+@use_primary
+def job_download(request, pk):
+    """Download the result file of a background job"""
+    job = _get_job(request, pk)
+    if not job.result_file:
+        raise Http404('This job has no result file')
+    return FileResponse(job.result_file.open('rb'), as_attachment=True,
+                        filename=os.path.basename(job.result_file.name))
@@ -0,0 +1,15 @@
+"""
+Celery application used when JOB_BACKEND is student.jobs.CeleryBackend.
+
+Start a worker with ``celery -A student_management worker``.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "student_management.settings")
+
+app = Celery("student_management")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
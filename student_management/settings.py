@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 
+from decouple import Csv, config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,6 +43,7 @@ INSTALLED_APPS = [
     "rest_framework",
     "django_filters",
     "corsheaders",
+    "channels",
     # Local apps
     "student",
     "accounts",
@@ -48,6 +51,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "student.routing.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -55,6 +59,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "student.middleware.QueryBudgetMiddleware",
 ]
 
 ROOT_URLCONF = "student_management.urls"
@@ -70,24 +75,106 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "student.context_processors.notifications",
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = "student_management.wsgi.application"
+ASGI_APPLICATION = "student_management.asgi.application"
+
+# Channel layer used to push notifications over WebSockets. The in-memory
+# layer only reaches sockets in the same process; use
+# channels_redis.core.RedisChannelLayer (CHANNEL_LAYER_BACKEND) in production.
+CHANNEL_LAYER_BACKEND = config("CHANNEL_LAYER_BACKEND", default="channels.layers.InMemoryChannelLayer")
+CHANNEL_LAYERS = {"default": {"BACKEND": CHANNEL_LAYER_BACKEND}}
+if CHANNEL_LAYER_BACKEND == "channels_redis.core.RedisChannelLayer":
+    CHANNEL_LAYERS["default"]["CONFIG"] = {
+        "hosts": [config("CHANNEL_REDIS_URL", default="redis://localhost:6379/1")],
+    }
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
+# Selected with DB_ENGINE=sqlite (default) or DB_ENGINE=postgresql; see .env.example
+DB_ENGINE = config("DB_ENGINE", default="sqlite")
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config("DB_NAME", default="student_management"),
+            "USER": config("DB_USER", default="postgres"),
+            "PASSWORD": config("DB_PASSWORD", default=""),
+            "HOST": config("DB_HOST", default="localhost"),
+            "PORT": config("DB_PORT", default="5432"),
+            # Keep connections open between requests and check them before reuse
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config("DB_NAME", default=str(BASE_DIR / "db.sqlite3")),
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                # Take the write lock when a transaction starts, so concurrent
+                # writers queue on busy_timeout instead of deadlocking
+                "transaction_mode": "IMMEDIATE",
+            },
+        }
+    }
+
+# Read replicas: comma-separated SQLite files or PostgreSQL hosts. Safe-method
+# requests read from them (see student.routing); writes go to "default".
+REPLICA_DATABASES = []
+for number, replica in enumerate(config("DB_REPLICAS", default="", cast=Csv()), start=1):
+    alias = f"replica{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST" if DB_ENGINE == "postgresql" else "NAME": replica,
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ["student.routing.ReplicaRouter"]
+
+# Seconds a client keeps reading from the primary after it writes
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=10, cast=int)
+
+# Applied to every new SQLite connection (see student.signals). WAL lets
+# readers run alongside a writer; busy_timeout makes writers wait for the
+# lock instead of failing straight away.
+SQLITE_PRAGMAS = {
+    "busy_timeout": config("SQLITE_BUSY_TIMEOUT", default=5000, cast=int),
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": config("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024, cast=int),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "student-management",
     }
 }
 
+# Seconds cached dashboard metrics may live before being recomputed, as a
+# safety net for changes that bypass the model signals
+DASHBOARD_CACHE_TTL = 300
+
+# Same safety net for the per-user unread notification counts
+NOTIFICATION_COUNT_CACHE_TTL = 3600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -155,7 +242,8 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Page numbers by default; pass ?cursor= for keyset pages
+    'DEFAULT_PAGINATION_CLASS': 'student.pagination.KeysetOptInPagination',
     'PAGE_SIZE': 10,
 }
 
@@ -174,11 +262,110 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For developm
 # EMAIL_USE_TLS = True
 # EMAIL_HOST_USER = 'your-email@gmail.com'
 # EMAIL_HOST_PASSWORD = 'your-app-password'
+DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", default="noreply@localhost")
 
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 
+# Student CSV import: rows written per bulk_create/bulk_update batch
+STUDENT_IMPORT_BATCH_SIZE = 1000
+
+# Academic years start on the 1st of this month; attendance of closed years
+# can be moved to the archive table with `python manage.py archive_attendance`
+ACADEMIC_YEAR_START_MONTH = 6
+ATTENDANCE_ARCHIVE_BATCH_SIZE = 5000
+
+# Students removed per transaction by bulk delete and archive
+STUDENT_REMOVAL_BATCH_SIZE = 500
+
+# Student exports: rows fetched per database round-trip
+STUDENT_EXPORT_CHUNK_SIZE = 2000
+
+# Background jobs (imports, exports, reports)
+# ThreadPoolBackend runs jobs inside the web process (single node).
+# For multi-node deployments use 'student.jobs.CeleryBackend' and run
+# `celery -A student_management worker`.
+JOB_BACKEND = 'student.jobs.ThreadPoolBackend'
+JOB_WORKERS = 4
+CELERY_BROKER_URL = 'redis://localhost:6379/0'
+
+# Per-request SQL query budgets checked by QueryBudgetMiddleware (DEBUG only).
+# Measured for a signed-in user with a cold cache, including the session and
+# user lookups; none of them grows with the number of rows listed.
+QUERY_BUDGET = {
+    'DEFAULT': 15,
+    'VIEWS': {
+        'dashboard': 8,
+        'student_list': 5,
+        'student_detail': 4,
+        'course_list': 4,
+        'course_detail': 5,
+        'attendance_list': 8,
+        'attendance_report': 6,
+        'mark_attendance': 4,
+        'assignment_list': 4,
+        'assignment_detail': 6,
+        'announcement_list': 4,
+        'notification_list': 4,
+        'gradebook': 5,
+        'class_reports': 4,
+        'student-list': 4,
+        'student-detail': 3,
+        'student-attendance': 5,
+        'student-courses': 4,
+        'course-list': 4,
+        'course-detail': 3,
+        'course-students': 4,
+        'enrollment-list': 4,
+        'attendance-list': 5,
+        'assignment-list': 4,
+        'submission-list': 4,
+        'notification-list': 4,
+        'announcement-list': 4,
+        'job-list': 4,
+        'api_stats': 7,
+        'api_analytics': 3,
+    },
+    'RAISE': False,
+}
+
+# Notifications created per bulk_create batch when fanning out to a course
+# or class; also the number of users emailed per SMTP connection round
+NOTIFICATION_BATCH_SIZE = 1000
+
+# Read notifications older than this are removed by prune_notifications
+NOTIFICATION_RETENTION_DAYS = 90
+
+# Lowest marks for each grade. After changing these run
+# `python manage.py regrade_students` to update stored grades.
+# Grades are single letters; the grade choices and their labels follow these.
+GRADE_BOUNDARIES = {
+    "A": 90,
+    "B": 80,
+    "C": 70,
+    "D": 60,
+    "F": 0,
+}
+
+# Students per UPDATE when recomputing grades
+GRADE_REGRADE_BATCH_SIZE = 10000
+
+# Marks analytics (/api/analytics/): percentiles reported and cache lifetime.
+# Cached results are also dropped whenever student data changes.
+ANALYTICS_PERCENTILES = [10, 25, 50, 75, 90]
+ANALYTICS_CACHE_TTL = 600
+
+# Seconds an approximate list total is cached for page navigation
+PAGINATION_COUNT_CACHE_TTL = 60
+
+# Student search backend; leave unset to pick one for the database in use
+# (SQLite FTS5, PostgreSQL trigram indexes, or plain substring search)
+STUDENT_SEARCH_BACKEND = None
+
+# Processes used to render batch report cards (None = one per CPU)
+REPORT_WORKERS = None
+
 # Session Settings
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_SAVE_EVERY_REQUEST = True